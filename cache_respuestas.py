@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+
+from indice_redes import normalizar
+
+# Palabras de cortesía o relleno que no cambian lo que se pregunta. Las negaciones ("no",
+# "nunca", "ni") y cualquier otra palabra nunca se ignoran: dos preguntas solo comparten
+# respuesta si el resto de sus palabras es exactamente el mismo
+PALABRAS_IGNORADAS = frozenset((
+    "hola", "oye", "sophia", "por", "favor", "gracias", "me", "puedes", "podrias", "dime", "decir",
+    "quisiera", "saber", "el", "la", "los", "las", "un", "una",
+))
+
+# Respuestas guardadas como máximo; se descartan las usadas hace más tiempo
+MAX_ENTRADAS = 200
+
+
+def _clave_palabras(texto):
+    """Conjunto ordenado de palabras con contenido, así "dime qué redes hay" y "qué redes hay" coinciden"""
+    return " ".join(sorted(set(texto.split()) - PALABRAS_IGNORADAS))
+
+
+class CacheRespuestas:
+    """
+    Cache de respuestas a preguntas de información general (CASO 1).
+
+    La clave es la pregunta normalizada (sin tildes, mayúsculas ni puntuación). Si no hay una
+    coincidencia exacta se prueba con sus palabras de contenido, sin orden ni palabras de
+    cortesía; no hay coincidencias aproximadas, así una negación u otra palabra distinta nunca
+    reutiliza una respuesta ajena. Las respuestas dependen del inventario, así que la cache se
+    vacía cuando cambia ``obtener_version()``.
+    """
+
+    def __init__(self, obtener_version, max_entradas=MAX_ENTRADAS):
+        """
+        :param obtener_version: Función sin argumentos que cambia de valor cuando cambia el inventario.
+        :param max_entradas: Respuestas guardadas como máximo.
+        """
+        self.obtener_version = obtener_version
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._version = None
+        self._entradas = OrderedDict()  # {pregunta normalizada: (clave de palabras, oraciones)}
+        self._por_palabras = {}  # {clave de palabras: pregunta normalizada}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _validar_version(self):
+        version = self.obtener_version()
+        if version != self._version:
+            if self._entradas:
+                print(f"Inventario actualizado: se descartan {len(self._entradas)} respuestas en cache.")
+            self._entradas.clear()
+            self._por_palabras.clear()
+            self._version = version
+
+    def obtener(self, pregunta):
+        """
+        :param pregunta: Texto transcrito.
+        :return: Lista de oraciones de la respuesta guardada, o None.
+        """
+        clave = normalizar(pregunta)
+        with self._lock:
+            self._validar_version()
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                parecida = self._por_palabras.get(_clave_palabras(clave))
+                if parecida is not None:
+                    print(f"Misma pregunta en cache con otras palabras: '{parecida}'")
+                    clave, entrada = parecida, self._entradas[parecida]
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return list(entrada[1])
+
+    def guardar(self, pregunta, oraciones):
+        """
+        Guarda la respuesta como lista de oraciones, así su audio también sale de la cache de Polly.
+        Solo deben guardarse respuestas a preguntas hechas sin historial de conversación: una
+        pregunta de seguimiento ("¿y la otra?") depende de lo anterior y no vale para otra sesión.
+        """
+        clave = normalizar(pregunta)
+        if not clave or not oraciones:
+            return
+        clave_palabras = _clave_palabras(clave)
+        with self._lock:
+            self._validar_version()
+            self._entradas[clave] = (clave_palabras, tuple(oraciones))
+            self._entradas.move_to_end(clave)
+            if clave_palabras:
+                self._por_palabras[clave_palabras] = clave
+            while len(self._entradas) > self.max_entradas:
+                _, (antigua_palabras, _) = self._entradas.popitem(last=False)
+                if self._por_palabras.get(antigua_palabras) not in self._entradas:
+                    self._por_palabras.pop(antigua_palabras, None)
+
+    def estadisticas(self):
+        with self._lock:
+            return {"respuestas": len(self._entradas), "aciertos": self.aciertos, "fallos": self.fallos}
@@ -0,0 +1,232 @@
+import io
+import os
+import queue
+import threading
+import wave
+from collections import deque
+
+import numpy as np
+import pyaudio
+
+FORMAT = pyaudio.paInt16
+CHANNELS = 1
+RATE = 44100
+CHUNK = 1024
+
+# Duración máxima que guarda el buffer circular; lo más antiguo se descarta
+MAX_SEGUNDOS = 120
+
+# Frecuencia del audio que se sube a Whisper (suficiente para voz y un tercio del tamaño)
+RATE_SALIDA = 16000
+
+# Detección de voz por energía: ventanas de 30 ms, umbral relativo al ruido de fondo
+VENTANA_VAD_S = 0.03
+FACTOR_RUIDO = 3.0
+UMBRAL_MIN_RMS = 300.0  # En unidades de int16; evita que el silencio digital cuente como voz
+MARGEN_S = 0.2  # Silencio que se conserva antes y después de la voz
+
+# Corte automático al terminar de hablar
+AUTO_DETENER = os.getenv("SOPHIA_AUTO_DETENER", "1") == "1"
+SILENCIO_FIN_S = float(os.getenv("SOPHIA_SILENCIO_FIN_S", "1.2"))
+CALIBRACION_S = 0.3  # Primeros bloques usados para medir el ruido de fondo
+MIN_VOZ_S = 0.15  # Voz continua necesaria para considerar que el usuario empezó a hablar
+
+# Filtro anti-aliasing antes de bajar la frecuencia: coeficientes del FIR y corte relativo a la
+# nueva frecuencia de Nyquist (a 44.1 kHz, 101 coeficientes dejan una transición de ~1.4 kHz)
+COEFICIENTES_FILTRO = 101
+CORTE_RELATIVO = 0.9
+
+
+def a_wav(frames, rate=RATE, channels=CHANNELS, sample_width=2):
+    """
+    Codifica frames PCM como WAV en memoria.
+
+    :param frames: Iterable de bloques de bytes PCM.
+    :return: BytesIO con el WAV, posicionado al inicio y listo para subir.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(rate)
+        wf.writeframes(b"".join(frames))
+    buffer.seek(0)
+    return buffer
+
+
+def _rms(muestras):
+    return np.sqrt(np.mean(np.square(muestras, dtype=np.float64), axis=-1))
+
+
+def recortar_silencio(muestras, rate, ventana_s=VENTANA_VAD_S, margen_s=MARGEN_S):
+    """
+    Recorta el silencio inicial y final con una detección de voz por energía.
+
+    :param muestras: Arreglo int16 mono.
+    :param rate: Frecuencia de muestreo.
+    :return: Las muestras entre la primera y la última ventana con voz (más el margen), o un
+             arreglo vacío si no se detectó voz.
+    """
+    largo = max(1, int(rate * ventana_s))
+    cantidad = len(muestras) // largo
+    if cantidad == 0:
+        return muestras[:0]
+    energia = _rms(muestras[:cantidad * largo].reshape(cantidad, largo))
+    umbral = max(UMBRAL_MIN_RMS, np.percentile(energia, 10) * FACTOR_RUIDO)
+    con_voz = np.flatnonzero(energia > umbral)
+    if con_voz.size == 0:
+        return muestras[:0]
+    margen = int(rate * margen_s)
+    inicio = max(0, con_voz[0] * largo - margen)
+    fin = min(len(muestras), (con_voz[-1] + 1) * largo + margen)
+    return muestras[inicio:fin]
+
+
+def _pasa_bajos(corte, coeficientes=COEFICIENTES_FILTRO):
+    """
+    FIR pasa bajos de sinc con ventana de Hamming.
+
+    :param corte: Frecuencia de corte como fracción de la frecuencia de muestreo (0 a 0.5).
+    :return: Coeficientes normalizados a ganancia 1 en continua.
+    """
+    n = np.arange(coeficientes) - (coeficientes - 1) / 2
+    filtro = np.sinc(2 * corte * n) * np.hamming(coeficientes)
+    return filtro / filtro.sum()
+
+
+def remuestrear(muestras, rate_origen, rate_destino=RATE_SALIDA):
+    """
+    Cambia la frecuencia de muestreo (int16 mono).
+
+    Al bajar la frecuencia se filtra primero lo que queda por encima de la nueva frecuencia de
+    Nyquist; sin el filtro, de 44.1 kHz a 16 kHz el contenido de 8 a 22 kHz se doblaría sobre la
+    banda de voz. Después se interpola linealmente en las nuevas posiciones.
+    """
+    if rate_origen == rate_destino or len(muestras) == 0:
+        return muestras
+    senal = muestras.astype(np.float64)
+    if rate_destino < rate_origen:
+        corte = CORTE_RELATIVO * rate_destino / (2 * rate_origen)
+        senal = np.convolve(senal, _pasa_bajos(corte), mode="same")
+    cantidad = int(len(muestras) * rate_destino / rate_origen)
+    posiciones = np.arange(cantidad) * (rate_origen / rate_destino)
+    remuestreadas = np.interp(posiciones, np.arange(len(senal)), senal)
+    return np.clip(np.round(remuestreadas), -32768, 32767).astype(np.int16)
+
+
+class GrabadorAudio:
+    """
+    Captura del micrófono en un hilo dedicado.
+
+    El hilo lee bloques sin pausas hacia un buffer circular, así la captura no depende del ciclo
+    de eventos de Tk y no se pierden bloques mientras la interfaz está ocupada. Al terminar, el
+    audio se recorta al tramo con voz y se baja a 16 kHz antes de codificarlo. Con
+    ``auto_detener`` la grabación se corta sola tras un silencio de ``SILENCIO_FIN_S``.
+
+    El hilo de captura no llama a código de la interfaz: cada WAV terminado, ya sea por el corte
+    automático o por ``detener``, se deja en la cola ``grabaciones`` para que el hilo de Tk lo
+    recoja. Cuando ``grabando`` pasa a False, el WAV de esa grabación (si hubo voz) ya está en la cola.
+    """
+
+    def __init__(self, rate=RATE, chunk=CHUNK, max_segundos=MAX_SEGUNDOS, auto_detener=AUTO_DETENER):
+        """
+        :param rate: Frecuencia de muestreo del micrófono.
+        :param chunk: Muestras por bloque leído.
+        :param max_segundos: Duración máxima guardada en el buffer circular.
+        :param auto_detener: Cortar la grabación sola cuando el usuario deja de hablar.
+        """
+        self.rate = rate
+        self.chunk = chunk
+        self.auto_detener = auto_detener
+        self.grabaciones = queue.Queue()  # WAV listos para transcribir
+        self._audio = pyaudio.PyAudio()
+        self._frames = deque(maxlen=max(1, max_segundos * rate // chunk))
+        self._grabando = threading.Event()
+        self._lock = threading.Lock()
+        self._entregado = False
+        self._hilo = None
+
+    @property
+    def grabando(self):
+        return self._grabando.is_set()
+
+    def _capturar(self, stream):
+        segundos_bloque = self.chunk / self.rate
+        bloques_calibracion = max(1, int(CALIBRACION_S / segundos_bloque))
+        energias_ruido = []
+        umbral = UMBRAL_MIN_RMS
+        voz_continua = silencio = 0.0
+        hablo = False
+        try:
+            while self._grabando.is_set():
+                bloque = stream.read(self.chunk, exception_on_overflow=False)
+                self._frames.append(bloque)
+                if not self.auto_detener:
+                    continue
+                energia = _rms(np.frombuffer(bloque, dtype=np.int16))
+                if len(energias_ruido) < bloques_calibracion:
+                    energias_ruido.append(energia)
+                    umbral = max(UMBRAL_MIN_RMS, float(np.median(energias_ruido)) * FACTOR_RUIDO)
+                    continue
+                if energia > umbral:
+                    voz_continua += segundos_bloque
+                    silencio = 0.0
+                    hablo = hablo or voz_continua >= MIN_VOZ_S
+                else:
+                    voz_continua = 0.0
+                    silencio += segundos_bloque
+                if hablo and silencio >= SILENCIO_FIN_S:
+                    print("Fin de la voz detectado; deteniendo la grabación.")
+                    # El WAV entra a la cola antes de marcar el fin de la grabación
+                    self._entregar()
+                    self._grabando.clear()
+        except Exception as e:
+            print(f"Error durante la grabación: {e}")
+            self._grabando.clear()
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def _entregar(self):
+        audio_wav = self._finalizar()
+        if audio_wav is not None:
+            self.grabaciones.put(audio_wav)
+
+    def _finalizar(self):
+        """Procesa lo grabado una sola vez, aunque el corte automático y el botón coincidan"""
+        with self._lock:
+            if self._entregado:
+                return None
+            self._entregado = True
+            frames = list(self._frames)
+        muestras = np.frombuffer(b"".join(frames), dtype=np.int16)
+        voz = remuestrear(recortar_silencio(muestras, self.rate), self.rate, RATE_SALIDA)
+        print(f"Audio: {len(muestras) / self.rate:.1f} s grabados, {len(voz) / RATE_SALIDA:.1f} s con voz "
+              f"a {RATE_SALIDA} Hz ({len(muestras) * 2 // 1024} KB -> {len(voz) * 2 // 1024} KB).")
+        if len(voz) == 0:
+            return None
+        return a_wav([voz.tobytes()], RATE_SALIDA, CHANNELS, self._audio.get_sample_size(FORMAT))
+
+    def iniciar(self):
+        """Abre el micrófono y empieza a capturar en segundo plano"""
+        stream = self._audio.open(format=FORMAT, channels=CHANNELS, rate=self.rate, input=True,
+                                  frames_per_buffer=self.chunk)
+        self._frames.clear()
+        self._entregado = False
+        self._grabando.set()
+        self._hilo = threading.Thread(target=self._capturar, args=(stream,), daemon=True,
+                                      name="captura-audio")
+        self._hilo.start()
+        print("Grabación iniciada. Puedes hablar ahora.")
+
+    def detener(self):
+        """
+        Detiene la captura y deja el WAV recortado a 16 kHz en ``grabaciones``; no agrega nada si
+        no hubo voz o si el corte automático ya entregó la grabación.
+        """
+        self._grabando.clear()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        print("Grabación detenida. Procesando el audio...")
+        self._entregar()
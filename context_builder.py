@@ -0,0 +1,121 @@
+import json
+import os
+
+try:
+    import tiktoken
+except ImportError:  # Sin tiktoken se usa una aproximación de 4 caracteres por token
+    tiktoken = None
+
+# Presupuesto de tokens del mensaje de sistema (persona + secciones)
+TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+
+# Marca agregada a una sección recortada
+TRUNCATION_MARK = " …[recortado]"
+
+# Prioridades: un número menor entra primero al contexto
+PRIORITY_LIVE_DATA = 0  # Datos en tiempo real que responden la pregunta (Splunk, Meraki)
+PRIORITY_INVENTORY = 1  # Inventario de organizaciones y redes
+PRIORITY_EXTRA = 5
+
+
+class TokenCounter:
+    """Cuenta y recorta texto con el tokenizador del modelo (o una aproximación si no hay tiktoken)."""
+
+    def __init__(self, model):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text):
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text))
+
+    def truncate(self, text, max_tokens):
+        """Devuelve el prefijo de text que ocupa como máximo max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[:max_tokens * 4]
+        tokens = self.encoding.encode(text)
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+
+def serialize(data):
+    """Serializa datos de forma compacta (sin indentación ni espacios sobrantes)"""
+    if isinstance(data, str):
+        return data
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class ContextBuilder:
+    """
+    Arma un mensaje de sistema nuevo para cada pregunta: la persona base más solo las secciones
+    relevantes, serializadas de forma compacta y dentro de un presupuesto de tokens.
+
+    Las secciones entran por prioridad. La primera que no cabe completa se recorta para ocupar el
+    espacio restante (una lista pierde sus últimos elementos; el resto se corta por tokens) y las
+    siguientes se omiten.
+    """
+
+    def __init__(self, persona, model, token_budget=TOKEN_BUDGET):
+        """
+        :param persona: Instrucciones base del asistente, siempre incluidas.
+        :param model: Modelo de OpenAI, para elegir el tokenizador.
+        :param token_budget: Máximo de tokens del mensaje de sistema.
+        """
+        self.persona = persona
+        self.token_budget = token_budget
+        self.counter = TokenCounter(model)
+        self.last_stats = {}
+
+    def _fit(self, header, data, available):
+        """Devuelve el texto de la sección recortado para ocupar como máximo available tokens"""
+        if isinstance(data, list):
+            # Búsqueda binaria de la mayor cantidad de elementos que entra completa
+            low, high = 0, len(data)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self.counter.count(header + serialize(data[:middle]) + TRUNCATION_MARK) <= available:
+                    low = middle
+                else:
+                    high = middle - 1
+            if low:
+                return header + serialize(data[:low]) + TRUNCATION_MARK
+        room = available - self.counter.count(header + TRUNCATION_MARK)
+        body = self.counter.truncate(serialize(data), room)
+        return header + body + TRUNCATION_MARK if body else None
+
+    def build(self, sections=()):
+        """
+        :param sections: Iterable de tuplas (prioridad, título, datos); datos puede ser texto o JSON serializable.
+        :return: Mensaje de sistema dentro del presupuesto. last_stats guarda tokens usados y secciones incluidas.
+        """
+        parts = [self.persona]
+        used = self.counter.count(self.persona)
+        included, truncated, omitted = [], [], []
+        for priority, title, data in sorted(sections, key=lambda section: section[0]):
+            if data is None:
+                continue
+            header = f"\n{title}:\n"
+            text = header + serialize(data)
+            tokens = self.counter.count(text)
+            if used + tokens <= self.token_budget:
+                parts.append(text)
+                used += tokens
+                included.append(title)
+                continue
+            fitted = None if truncated else self._fit(header, data, self.token_budget - used)
+            if fitted:
+                parts.append(fitted)
+                used += self.counter.count(fitted)
+                truncated.append(title)
+            else:
+                omitted.append(title)
+        self.last_stats = {"tokens": used, "included": included, "truncated": truncated, "omitted": omitted}
+        if truncated or omitted:
+            print(f"Contexto recortado al presupuesto de {self.token_budget} tokens: {self.last_stats}")
+        return "".join(parts)
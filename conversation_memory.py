@@ -0,0 +1,111 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from context_builder import TokenCounter
+
+# Turnos (pregunta + respuesta) que se envían textuales; los anteriores se resumen
+KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+
+# Máximo de bytes del historial enviado en cada petición
+MAX_BYTES = int(os.getenv("HISTORY_MAX_BYTES", "16000"))
+
+
+class ConversationMemory:
+    """
+    Historial de la conversación con compactación progresiva.
+
+    Los últimos ``keep_turns`` turnos se envían textuales; los más antiguos se integran en un
+    resumen acumulado que se genera en un hilo aparte entre turnos, así la petición siguiente no
+    espera al resumen. Mientras un resumen está en curso, los mensajes que se están resumiendo
+    se siguen enviando textuales para no perder información.
+    """
+
+    def __init__(self, summarize, model, keep_turns=KEEP_TURNS, max_bytes=MAX_BYTES):
+        """
+        :param summarize: Función (resumen_anterior, mensajes) -> nuevo resumen.
+        :param model: Modelo de OpenAI, para contar tokens.
+        :param keep_turns: Turnos recientes que se envían textuales.
+        :param max_bytes: Tope de bytes del historial enviado en cada petición.
+        """
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.max_bytes = max_bytes
+        self.counter = TokenCounter(model)
+        self.summary = ""
+        self._recent = []  # Mensajes textuales
+        self._folding = []  # Mensajes que se están integrando al resumen
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resumen-historial")
+        self._future = None
+        self._full_tokens = 0  # Tokens que ocuparía el historial completo sin compactar
+        self.tokens_saved = 0
+        self.last_stats = {}
+
+    def add(self, role, content):
+        with self._lock:
+            self._recent.append({"role": role, "content": content})
+            self._full_tokens += self.counter.count(content)
+
+    def is_empty(self):
+        """True si todavía no hay mensajes ni resumen de turnos anteriores"""
+        with self._lock:
+            return not (self.summary or self._folding or self._recent)
+
+    def messages(self):
+        """
+        Devuelve los mensajes a enviar: el resumen acumulado, los mensajes en proceso de resumen y
+        los turnos recientes, descartando los más antiguos si se supera max_bytes.
+        """
+        with self._lock:
+            history = self._folding + self._recent
+            summary = self.summary
+        # El último mensaje (la pregunta actual) siempre se envía
+        kept = history[-1:]
+        size = len(kept[0]["content"].encode("utf-8")) if kept else 0
+        if summary:
+            size += len(summary.encode("utf-8"))
+        for message in reversed(history[:-1]):
+            message_size = len(message["content"].encode("utf-8"))
+            if size + message_size > self.max_bytes:
+                break
+            size += message_size
+            kept.insert(0, message)
+        if summary:
+            kept.insert(0, {"role": "system", "content": f"Resumen de la conversación anterior: {summary}"})
+
+        sent_tokens = sum(self.counter.count(message["content"]) for message in kept)
+        saved = max(0, self._full_tokens - sent_tokens)
+        self.tokens_saved += saved
+        self.last_stats = {"messages": len(kept), "bytes": size, "tokens": sent_tokens, "tokens_saved": saved}
+        if saved:
+            print(f"Historial compactado: {sent_tokens} tokens enviados, {saved} ahorrados "
+                  f"({self.tokens_saved} en la sesión).")
+        return kept
+
+    def compact(self):
+        """Si hay más turnos que keep_turns, integra los más antiguos al resumen en segundo plano"""
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return  # El siguiente compact toma lo que quede pendiente
+            excess = len(self._recent) - self.keep_turns * 2
+            if excess <= 0:
+                return
+            self._folding = self._recent[:excess]
+            self._recent = self._recent[excess:]
+            folding, summary = list(self._folding), self.summary
+        self._future = self._executor.submit(self._fold, summary, folding)
+
+    def _fold(self, summary, folding):
+        try:
+            new_summary = self.summarize(summary, folding)
+        except Exception as e:
+            # Si el resumen falla, los mensajes vuelven al historial textual
+            print(f"Error al resumir el historial: {e}")
+            with self._lock:
+                self._recent = self._folding + self._recent
+                self._folding = []
+            return
+        with self._lock:
+            self.summary = new_summary
+            self._folding = []
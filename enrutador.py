@@ -0,0 +1,110 @@
+import re
+import threading
+
+from indice_redes import normalizar
+
+# Confianza mínima para responder sin consultar al clasificador LLM
+UMBRAL_CONFIANZA = 0.8
+
+# Reglas por caso: palabras clave ya normalizadas (minúsculas y sin tildes). Se comparan como
+# palabras completas (o frases completas), así "log" no coincide con "logro"; los plurales van
+# escritos aparte y solo los prefijos listados coinciden con cualquier terminación
+PALABRAS_SPLUNK = (
+    "splunk", "log", "logs", "evento", "eventos", "ssh", "fuerza bruta", "ataque", "ataques",
+    "intento", "intentos", "login", "logins", "inicio de sesion", "contrasena", "contrasenas",
+    "password", "alerta", "alertas", "incidente", "incidentes", "brute", "ips atacantes",
+)
+PREFIJOS_SPLUNK = ("sospechos",)  # sospechoso, sospechosa, sospechosos...
+PALABRAS_MERAKI = (
+    "meraki", "dispositivo", "dispositivos", "equipo", "equipos", "cliente", "clientes", "vlan",
+    "vlans", "ssid", "ssids", "wifi", "firewall", "access point", "access points", "switch",
+    "switches", "router", "routers", "uptime", "puerto", "puertos", "firmware", "conectado",
+    "conectados", "en linea", "caido", "caidos", "caida", "caidas", "estado", "estados",
+)
+PATRONES_INFO_GENERAL = (
+    re.compile(r"\bque redes\b"), re.compile(r"\bredes (tienes|tienen|hay|disponibles)\b"),
+    re.compile(r"\borganizacion(es)?\b"), re.compile(r"\bquien eres\b"), re.compile(r"\btxdx\b"),
+    re.compile(r"\bque (es|haces|puedes)\b"), re.compile(r"\bhola\b|\bbuen(os|as) (dias|tardes|noches)\b"),
+)
+
+
+def _contar(texto, palabras, prefijos=()):
+    """Cuenta las palabras o frases clave presentes completas en el texto normalizado, más los prefijos"""
+    palabras_texto = f" {texto} "
+    total = sum(1 for palabra in palabras if f" {palabra} " in palabras_texto)
+    return total + sum(1 for prefijo in prefijos if f" {prefijo}" in palabras_texto)
+
+
+class EnrutadorPreguntas:
+    """
+    Enrutador local de preguntas que se ejecuta antes del clasificador LLM.
+
+    Combina reglas de palabras clave por caso con una búsqueda aproximada del nombre de la red
+    entre las redes conocidas (así "OfficeLima" se resuelve como "Office Lima"). Devuelve el
+    caso, la red y una confianza; si la confianza es baja el llamador debe usar el clasificador
+    LLM. Lleva la cuenta de aciertos locales y fallbacks.
+    """
+
+    def __init__(self, indice_redes, umbral=UMBRAL_CONFIANZA):
+        """
+        :param indice_redes: IndiceRedes con el inventario de redes conocidas.
+        :param umbral: Confianza mínima para no recurrir al LLM.
+        """
+        self.indice_redes = indice_redes
+        self.umbral = umbral
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallbacks = 0
+        self.latencia_llm_total = 0.0
+
+    def enrutar(self, pregunta):
+        """
+        :param pregunta: Texto transcrito.
+        :return: Diccionario {caso, red, confianza, usar_llm, motivo}.
+        """
+        texto = normalizar(pregunta)
+        splunk = _contar(texto, PALABRAS_SPLUNK, PREFIJOS_SPLUNK)
+        meraki = _contar(texto, PALABRAS_MERAKI)
+        general = any(patron.search(texto) for patron in PATRONES_INFO_GENERAL)
+        encontrada = self.indice_redes.buscar_en_texto(texto)
+        red = encontrada["name"] if encontrada else None
+
+        if splunk and meraki:
+            resultado = (2 if splunk > meraki else 3, red, 0.5, "palabras de Splunk y de Meraki")
+        elif splunk:
+            resultado = (2, None, 0.9, "palabras clave de Splunk")
+        elif meraki and red:
+            resultado = (3, red, 0.95, f"palabras clave de Meraki y red '{red}'")
+        elif meraki:
+            resultado = (3, None, 0.6, "palabras clave de Meraki sin red")
+        elif general and not red:
+            resultado = (1, None, 0.9, "pregunta de información general")
+        elif red:
+            resultado = (3, red, 0.6, f"se menciona la red '{red}' sin palabras clave")
+        else:
+            resultado = (1, None, 0.4, "sin reglas aplicables")
+
+        caso, red, confianza, motivo = resultado
+        usar_llm = confianza < self.umbral
+        with self._lock:
+            if usar_llm:
+                self.fallbacks += 1
+            else:
+                self.aciertos += 1
+        return {"caso": caso, "red": red, "confianza": confianza, "usar_llm": usar_llm, "motivo": motivo}
+
+    def registrar_latencia_llm(self, segundos):
+        """Registra cuánto tardó una clasificación con el LLM, para estimar el tiempo ahorrado"""
+        with self._lock:
+            self.latencia_llm_total += segundos
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallbacks
+            latencia_media = self.latencia_llm_total / self.fallbacks if self.fallbacks else 0.0
+            return {
+                "aciertos_locales": self.aciertos,
+                "fallbacks_llm": self.fallbacks,
+                "tasa_aciertos": round(self.aciertos / total, 3) if total else 0.0,
+                "segundos_ahorrados_estimados": round(self.aciertos * latencia_media, 2),
+            }
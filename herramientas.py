@@ -0,0 +1,192 @@
+import json
+import os
+
+import requests
+
+from context_builder import TokenCounter, serialize
+from meraki_utils import SECCIONES_RED, obtener_datos_red
+from splunk_utils import SplunkError, filter_results, get_default_client
+
+# Tope de tokens del resultado de una herramienta antes de devolverlo al modelo
+MAX_TOKENS_RESULTADO = int(os.getenv("TOOL_RESULT_MAX_TOKENS", "3000"))
+
+# Resultados máximos de una búsqueda SPL pedida por el modelo
+MAX_RESULTADOS_SPLUNK = 50
+
+# Comandos que el modelo puede encadenar con "|" después de "search"; solo filtran, extraen o
+# resumen eventos. Cualquier otro (rest, outputlookup, collect, sendemail, map, script...) se
+# rechaza, porque la búsqueda corre con la cuenta de Splunk del asistente
+COMANDOS_SPL_PERMITIDOS = {
+    "search", "where", "stats", "top", "rare", "head", "tail", "sort", "table", "fields", "rex",
+    "eval", "dedup", "timechart", "chart", "rename", "fillnull",
+}
+
+# Definiciones en el formato de tools de la API de Chat Completions de OpenAI
+DEFINICIONES = [
+    {
+        "type": "function",
+        "function": {
+            "name": "consultar_red_meraki",
+            "description": "Obtiene datos en tiempo real de una red de Cisco Meraki: estado de dispositivos, "
+                           "clientes conectados, reglas de firewall, VLANs y SSIDs.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "nombre_red": {
+                        "type": "string",
+                        "description": "Nombre de la red tal como aparece en el inventario, por ejemplo 'Office Lima'."
+                    },
+                    "secciones": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": list(SECCIONES_RED)},
+                        "description": "Secciones a consultar; si se omite se devuelven todas."
+                    }
+                },
+                "required": ["nombre_red"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "consultar_eventos_splunk",
+            "description": "Consulta eventos de seguridad de Cisco Splunk. Sin argumentos devuelve un resumen "
+                           "(IPs con intentos de fuerza bruta, conteos por host y sourcetype). Con ip o usuario "
+                           "devuelve los eventos de ese origen. Con busqueda ejecuta una consulta SPL.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "ip": {"type": "string", "description": "IP de origen a buscar."},
+                    "usuario": {"type": "string", "description": "Usuario a buscar."},
+                    "busqueda": {
+                        "type": "string",
+                        "description": "Consulta SPL que empiece con 'search', por ejemplo 'search index=main error "
+                                       "| stats count by host'. Solo se permiten comandos de filtrado y estadísticas."
+                    }
+                }
+            }
+        }
+    },
+]
+
+
+def _separar_comandos(busqueda):
+    """Divide una búsqueda SPL por los "|" que están fuera de comillas; None si abre una subbúsqueda"""
+    comandos, actual, en_comillas, escapado = [], [], False, False
+    for caracter in busqueda:
+        if escapado:
+            escapado = False
+        elif caracter == "\\":
+            escapado = True
+        elif caracter == '"':
+            en_comillas = not en_comillas
+        elif not en_comillas and caracter == "[":
+            return None
+        elif not en_comillas and caracter == "|":
+            comandos.append("".join(actual))
+            actual = []
+            continue
+        actual.append(caracter)
+    comandos.append("".join(actual))
+    return comandos
+
+
+def validar_busqueda(busqueda):
+    """
+    Acepta solo búsquedas "search ..." seguidas de comandos de COMANDOS_SPL_PERMITIDOS.
+
+    :param busqueda: Consulta SPL escrita por el modelo (con o sin "search" al inicio).
+    :return: La consulta con el prefijo "search".
+    :raises ValueError: Si empieza con un comando generador, abre una subbúsqueda o usa un comando no permitido.
+    """
+    busqueda = busqueda.strip()
+    if busqueda.startswith("|"):
+        raise ValueError("solo se permiten búsquedas que empiecen con 'search'")
+    if not busqueda.startswith("search"):
+        busqueda = f"search {busqueda}"
+    comandos = _separar_comandos(busqueda)
+    if comandos is None:
+        raise ValueError("no se permiten subbúsquedas")
+    for comando in comandos:
+        nombre = (comando.split() or [""])[0].lower()
+        if nombre not in COMANDOS_SPL_PERMITIDOS:
+            raise ValueError(f"comando SPL no permitido: '{nombre}'")
+    return busqueda
+
+
+class Herramientas:
+    """
+    Consultas de Meraki y Splunk expuestas al modelo como herramientas (function calling).
+
+    El modelo decide cuándo llamarlas; ``ejecutar`` recibe el nombre y los argumentos JSON de la
+    llamada y devuelve el resultado serializado y acotado a ``MAX_TOKENS_RESULTADO``.
+    """
+
+    def __init__(self, meraki_key, model, obtener_store_splunk, indice_redes, splunk_client=None):
+        """
+        :param meraki_key: Clave de API de Meraki.
+        :param model: Modelo de OpenAI, para contar tokens.
+        :param obtener_store_splunk: Función sin argumentos que devuelve el EventStore de Splunk vigente.
+        :param indice_redes: IndiceRedes para resolver el nombre de red que pide el modelo.
+        :param splunk_client: SplunkClient para búsquedas SPL (por defecto el cliente compartido).
+        """
+        self.meraki_key = meraki_key
+        self.obtener_store_splunk = obtener_store_splunk
+        self.indice_redes = indice_redes
+        self.splunk_client = splunk_client
+        self.counter = TokenCounter(model)
+        self.definiciones = DEFINICIONES
+        self.llamadas = 0  # Herramientas ejecutadas en la sesión
+        self._funciones = {
+            "consultar_red_meraki": self.consultar_red_meraki,
+            "consultar_eventos_splunk": self.consultar_eventos_splunk,
+        }
+
+    def consultar_red_meraki(self, nombre_red, secciones=None):
+        red = self.indice_redes.resolver(nombre_red)
+        if red is None:
+            return {"error": f"No se encontró la red '{nombre_red}' en el inventario."}
+        datos = obtener_datos_red(self.meraki_key, red["org_id"], red["network_id"], output_file=None,
+                                  concurrente=True, usar_cache=True, modo_bulk=True)
+        if secciones:
+            datos = {seccion: datos.get(seccion) for seccion in secciones}
+        return {"red": red["name"], **datos}
+
+    def consultar_eventos_splunk(self, ip=None, usuario=None, busqueda=None):
+        if busqueda:
+            try:
+                busqueda = validar_busqueda(busqueda)
+            except ValueError as e:
+                return {"error": f"Búsqueda rechazada: {e}"}
+            client = self.splunk_client or get_default_client()
+            try:
+                resultados = client.run_search(f"{busqueda} | head {MAX_RESULTADOS_SPLUNK}", exec_mode="oneshot")
+            except (SplunkError, requests.RequestException) as e:
+                return {"error": f"No se pudo ejecutar la búsqueda en Splunk: {e}"}
+            return {"busqueda": busqueda, "resultados": filter_results(resultados, parse=True)}
+        store = self.obtener_store_splunk()
+        if ip:
+            return {"ip": ip, "eventos": store.lookup("src_ip", ip)}
+        if usuario:
+            return {"usuario": usuario, "eventos": store.lookup("user", usuario)}
+        return store.summary()
+
+    def ejecutar(self, nombre, argumentos):
+        """
+        Ejecuta una herramienta pedida por el modelo.
+
+        :param nombre: Nombre de la función.
+        :param argumentos: Argumentos en JSON, tal como los envía el modelo.
+        :return: Resultado serializado en JSON compacto.
+        """
+        self.llamadas += 1
+        funcion = self._funciones.get(nombre)
+        if funcion is None:
+            resultado = {"error": f"Herramienta desconocida: {nombre}"}
+        else:
+            try:
+                resultado = funcion(**json.loads(argumentos or "{}"))
+            except (TypeError, ValueError) as e:
+                resultado = {"error": f"Argumentos inválidos para {nombre}: {e}"}
+        print(f"Herramienta {nombre}({argumentos}) ejecutada.")
+        return self.counter.truncate(serialize(resultado), MAX_TOKENS_RESULTADO)
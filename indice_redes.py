@@ -0,0 +1,208 @@
+import difflib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from meraki_utils import cargar_inventario
+
+# Archivo opcional de alias: {"alias": "nombre de red o network_id"}
+ALIAS_FILE = os.getenv("MERAKI_ALIAS_FILE", "alias_redes.json")
+
+# Similitud mínima (difflib) para aceptar un nombre aproximado
+UMBRAL_SIMILITUD = 0.75
+
+# Similitud mínima al buscar una red dentro de una frase completa (más estricta que un nombre suelto)
+UMBRAL_SIMILITUD_TEXTO = 0.8
+
+# Nombres preseleccionados por trigramas que se comparan con difflib
+MAX_CANDIDATAS = 5
+
+# Palabras máximas de un nombre de red al buscarlo dentro de una frase
+MAX_PALABRAS_NOMBRE = 4
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni signos de puntuación y con espacios simples"""
+    texto = unicodedata.normalize("NFKD", texto.casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", texto.replace("_", " ")).split())
+
+
+def clave(texto):
+    """Clave de búsqueda: texto normalizado sin espacios, así "OfficeLima" y "Office Lima" coinciden"""
+    return normalizar(texto).replace(" ", "")
+
+
+def _trigramas(texto):
+    texto = f"  {texto} "
+    return Counter(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+class IndiceRedes:
+    """
+    Índice en memoria del inventario de organizaciones y redes de Meraki.
+
+    Se carga una vez y se recarga solo cuando cambia la fecha de modificación del archivo.
+    Nombres, alias y IDs se resuelven a la red en O(1) con claves insensibles a tildes,
+    mayúsculas y espacios; los nombres que la transcripción deforma se buscan por trigramas.
+    """
+
+    def __init__(self, inventario_file="organizations_and_networks.json", alias_file=ALIAS_FILE):
+        """
+        :param inventario_file: Archivo JSON del inventario de organizaciones y redes.
+        :param alias_file: Archivo JSON opcional con alias de red.
+        """
+        self.inventario_file = inventario_file
+        self.alias_file = alias_file
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._version = 0  # Aumenta con cada reconstrucción del índice
+        self._organizaciones = []
+        self._por_clave = {}  # {clave de nombre, alias o ID: red}
+        self._trigramas = {}  # {trigrama: {claves de nombre}}
+        self._largos = {}  # {clave de nombre: cantidad de trigramas}
+        self._recargar_si_cambio()
+
+    def _mtime(self, archivo):
+        try:
+            return os.stat(archivo).st_mtime_ns
+        except OSError:
+            return None
+
+    def _recargar_si_cambio(self):
+        mtimes = self._mtimes_actuales()
+        if mtimes == self._mtimes:
+            return
+        organizaciones = cargar_inventario(self.inventario_file)
+        self.actualizar(organizaciones, mtimes)
+        print(f"Índice de redes cargado desde {self.inventario_file}: {len(self.nombres())} redes.")
+
+    def _cargar_alias(self):
+        try:
+            with open(self.alias_file, "r", encoding="utf-8") as alias_file:
+                return json.load(alias_file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _indexar_trigramas(trigramas, clave_nombre):
+        conteo = _trigramas(clave_nombre)
+        for trigrama in conteo:
+            trigramas.setdefault(trigrama, set()).add(clave_nombre)
+        return sum(conteo.values())
+
+    def _mtimes_actuales(self):
+        return self._mtime(self.inventario_file), self._mtime(self.alias_file)
+
+    def actualizar(self, organizaciones, mtimes=None):
+        """
+        Reconstruye el índice a partir de una lista de organizaciones ya cargada.
+
+        :param organizaciones: Inventario, normalmente el que se acaba de escribir en el archivo.
+        :param mtimes: Fechas de modificación de los archivos leídos (por defecto, las actuales);
+                       así la próxima consulta no vuelve a reconstruir el mismo inventario.
+        """
+        if mtimes is None:
+            mtimes = self._mtimes_actuales()
+        por_clave, trigramas, largos = {}, {}, {}
+        for org in organizaciones:
+            for network in org.get("networks", []):
+                red = {"org_id": org["org_id"], "org_name": org.get("name"),
+                       "network_id": network["network_id"], "name": network["name"]}
+                clave_nombre = clave(network["name"])
+                por_clave[clave_nombre] = red
+                por_clave[clave(network["network_id"])] = red
+                largos[clave_nombre] = self._indexar_trigramas(trigramas, clave_nombre)
+        for alias, destino in self._cargar_alias().items():
+            red = por_clave.get(clave(destino))
+            if red is not None:
+                clave_alias = clave(alias)
+                por_clave[clave_alias] = red
+                largos[clave_alias] = self._indexar_trigramas(trigramas, clave_alias)
+        with self._lock:
+            self._mtimes = mtimes
+            self._organizaciones = organizaciones
+            self._version += 1
+            self._por_clave = por_clave
+            self._trigramas = trigramas
+            self._largos = largos
+
+    def organizaciones(self):
+        """Inventario completo, tal como está en el archivo"""
+        self._recargar_si_cambio()
+        return self._organizaciones
+
+    def version(self):
+        """Número que cambia cada vez que cambia el inventario; sirve para invalidar caches derivadas"""
+        self._recargar_si_cambio()
+        with self._lock:
+            return self._version
+
+    def nombres(self):
+        with self._lock:
+            return [network["name"] for org in self._organizaciones for network in org.get("networks", [])]
+
+    def _aproximado(self, clave_buscada, umbral):
+        """
+        Devuelve (red, similitud) del nombre más parecido, o (None, 0.0) si ninguno llega al umbral.
+        Los trigramas preseleccionan candidatas sin recorrer todo el inventario; la similitud final
+        se mide con difflib sobre esas pocas candidatas.
+        """
+        buscados = _trigramas(clave_buscada)
+        comunes = Counter()
+        with self._lock:
+            for trigrama, cantidad in buscados.items():
+                for candidata in self._trigramas.get(trigrama, ()):
+                    comunes[candidata] += cantidad
+            total_buscados = sum(buscados.values())
+            candidatas = sorted(comunes, key=lambda c: 2 * comunes[c] / (total_buscados + self._largos[c]),
+                                reverse=True)[:MAX_CANDIDATAS]
+            mejor, mejor_similitud = None, 0.0
+            for candidata in candidatas:
+                similitud = difflib.SequenceMatcher(None, clave_buscada, candidata).ratio()
+                if similitud > mejor_similitud:
+                    mejor, mejor_similitud = candidata, similitud
+            if mejor_similitud < umbral:
+                return None, 0.0
+            return self._por_clave[mejor], mejor_similitud
+
+    def resolver(self, nombre):
+        """
+        Resuelve un nombre, alias o ID de red.
+
+        :param nombre: Texto tal como lo dijo el usuario o lo escribió el modelo.
+        :return: Diccionario {org_id, org_name, network_id, name} o None si no hay coincidencia.
+        """
+        self._recargar_si_cambio()
+        clave_buscada = clave(nombre)
+        if not clave_buscada:
+            return None
+        with self._lock:
+            red = self._por_clave.get(clave_buscada)
+        if red is not None:
+            return red
+        return self._aproximado(clave_buscada, UMBRAL_SIMILITUD)[0]
+
+    def buscar_en_texto(self, texto):
+        """Devuelve la red mencionada en una frase (coincidencia exacta de sus palabras o aproximada), o None"""
+        self._recargar_si_cambio()
+        palabras = normalizar(texto).split()
+        ventanas = [
+            "".join(palabras[i:i + n])
+            for n in range(min(MAX_PALABRAS_NOMBRE, len(palabras)), 0, -1)
+            for i in range(len(palabras) - n + 1)
+        ]
+        with self._lock:
+            for ventana in ventanas:
+                red = self._por_clave.get(ventana)
+                if red is not None:
+                    return red
+        mejor, mejor_similitud = None, 0.0
+        for ventana in ventanas:
+            red, similitud = self._aproximado(ventana, UMBRAL_SIMILITUD_TEXTO)
+            if similitud > mejor_similitud:
+                mejor, mejor_similitud = red, similitud
+        return mejor
@@ -1,16 +1,26 @@
 import os
 import tkinter as tk
 from tkinter import messagebox
-import pyaudio
-import wave
-from pathlib import Path
 from openai import OpenAI
 import requests
-import boto3
 from dotenv import load_dotenv
 import json
-from meraki_utils import listar_organizaciones_y_redes,obtener_datos_red
+from meraki_utils import descubrir_inventario_en_segundo_plano,obtener_datos_red
 import re
+from splunk_collector import IncrementalCollector
+from splunk_store import EventStore
+from conversation_memory import ConversationMemory
+from herramientas import Herramientas
+from context_builder import ContextBuilder, PRIORITY_INVENTORY, PRIORITY_LIVE_DATA, PRIORITY_EXTRA
+from enrutador import EnrutadorPreguntas
+from indice_redes import IndiceRedes
+from voz_polly import VozPolly, dividir_en_oraciones
+from captura_audio import GrabadorAudio
+from cache_respuestas import CacheRespuestas
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
 
 # Cargar las variables desde el archivo .env
 load_dotenv()
@@ -21,9 +31,12 @@ AWS_REGION = os.getenv("AWS_REGION", "us-east-1")  # Valor por defecto: us-east-
 POLLY_VOICE_ID = os.getenv("POLLY_VOICE_ID", "Lucia")  # Valor por defecto: Lucia
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4")  # Valor por defecto: gpt-4-turbo
 MERAKI_KEY = os.getenv("MERAKI_KEY")
-
-# Listar organizaciones y redes (dependiendo del uso en tu programa)
-listar_organizaciones_y_redes(MERAKI_KEY)
+SPLUNK_COLLECT_INTERVAL = int(os.getenv("SPLUNK_COLLECT_INTERVAL", "60"))  # 0 desactiva el recolector
+SPLUNK_CONTEXT_EVENTS = int(os.getenv("SPLUNK_CONTEXT_EVENTS", "200"))  # Eventos recientes enviados al modelo
+# Con herramientas el modelo consulta Meraki y Splunk por sí mismo y no se usa classify_question;
+# desactivado por defecto para conservar el flujo del clasificador
+MODO_HERRAMIENTAS = os.getenv("SOPHIA_MODO_HERRAMIENTAS", "0") == "1"
+MAX_RONDAS_HERRAMIENTAS = 3
 
 # Verificar que las claves estén cargadas
 if not OPENAI_API_KEY:
@@ -35,69 +48,110 @@ if not MERAKI_KEY:
 # Configuración de OpenAI
 client = OpenAI(api_key=OPENAI_API_KEY)
 
-# Leer el contenido del archivo JSON en lugar de los TXT
+# Inventario de organizaciones y redes indexado en memoria; se recarga cuando cambia el archivo
 organizations_and_networks_file = "organizations_and_networks.json"
-additional_context = ""
+indice_redes = IndiceRedes(organizations_and_networks_file)
 
-if Path(organizations_and_networks_file).exists():
-    try:
-        with open(organizations_and_networks_file, "r", encoding="utf-8") as file:
-            json_data = json.load(file)
-            additional_context = json.dumps(json_data, indent=4, ensure_ascii=False)
-            print(f"Archivo {organizations_and_networks_file} cargado correctamente.")
-    except Exception as e:
-        print(f"Error al cargar el archivo {organizations_and_networks_file}: {e}")
-else:
-    print(f"Archivo {organizations_and_networks_file} no encontrado.")
 
-# Contexto principal del asistente
+def actualizar_inventario(organizaciones, cambios):
+    indice_redes.actualizar(organizaciones)
+    print(f"Inventario de Meraki actualizado en segundo plano: {cambios}")
+
+
+# Refrescar organizaciones y redes en segundo plano; mientras tanto se usa el inventario guardado
+descubrir_inventario_en_segundo_plano(MERAKI_KEY, organizations_and_networks_file, al_cambiar=actualizar_inventario)
+
+# Persona base del asistente; el contexto de cada pregunta se arma a partir de ella
 ASSISTANT_CONTEXT = (
-    "Saluda diciendo tu nombre el cual es SOPHIA, luego presentas quien eres y di Bienvenido al Experience Operacion Center. "
+    "Tu nombre es SOPHIA. El saludo de bienvenida ya se reprodujo al abrir el asistente, asi que no vuelvas a saludar ni a presentarte. "
     "Eres la Inteligencia artificial de la empresa TXDX SECURE. "
     "Tu funcion es atender a los clientes que hagan una llamada para monitorear sus equipos, resolver dudas y generar tickets para la resolucion de problemas. "
     "TXDXSECURE es una empresa dedicada a redes y ciberseguridad. "
     "Te haran preguntas de ciberseguridad . "
     "Cuando entregues un informe, interpreta los resultados y proporciona un resumen claro y útil."
-    f"\nInformación adicional:\n{additional_context}"  # Incluir el contenido del archivo JSON
 )
+context_builder = ContextBuilder(ASSISTANT_CONTEXT, MODEL)
 
 print(ASSISTANT_CONTEXT)
 
 splunk_json_file = "splunk.json"
-meraki_json_file = "network_data.json"
-# Audio Configuration
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-RATE = 44100
-CHUNK = 1024
-AUDIO_FILE = "mensaje1.wav"
 
-recording = False
-frames = []
-stream = None
-audio_interface = None
+# Recolector incremental de Splunk; si está desactivado o vacío se usa splunk.json
+splunk_collector = IncrementalCollector()
+if SPLUNK_COLLECT_INTERVAL > 0:
+    splunk_collector.start_background(SPLUNK_COLLECT_INTERVAL)
 
-# Historial de mensajes
-conversation_history = []
+# Transcribir, responder y hablar fuera del hilo de Tk; una pregunta a la vez
+procesador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="procesar-pregunta")
 
+# Estado de la interfaz: "listo", "grabando" o "procesando". Solo el hilo de Tk lo lee y lo
+# cambia; los demás hilos nunca llaman a Tk, la interfaz los revisa cada INTERVALO_REVISION_MS
+estado = "listo"
+pregunta_en_curso = None  # Future de la pregunta que se está procesando
+INTERVALO_REVISION_MS = 100
 
-def agregar_json_al_contexto(json_file, context_variable):
-    try:
-        # Abrir y leer el archivo JSON
-        with open(json_file, "r", encoding="utf-8") as file:
-            json_data = json.load(file)
-
-        # Formatear el contenido JSON como texto legible
-        formatted_text = f"\nContenido de {json_file}:\n"
-        formatted_text += json.dumps(json_data, indent=4, ensure_ascii=False)
-
-        # Agregar el contenido formateado al contexto
-        context_variable += formatted_text
-        print(f"Contenido de {json_file} agregado correctamente al contexto.")
-        return context_variable
-    except Exception as e:
-        print(f"Error al procesar el archivo JSON {json_file}: {e}")
-        return context_variable
+
+# Function to fold older turns into the running summary (runs in the background)
+def resumir_conversacion(resumen_anterior, mensajes):
+    transcripcion = "\n".join(f"{m['role']}: {m['content']}" for m in mensajes)
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system",
+             "content": "Resume de forma breve la conversación entre un cliente y SOPHIA. Conserva nombres de "
+                        "redes, organizaciones, dispositivos, IPs, problemas reportados y acuerdos. "
+                        "Integra el resumen anterior con los mensajes nuevos y responde solo con el resumen."},
+            {"role": "user", "content": f"Resumen anterior: {resumen_anterior or 'ninguno'}\n\nMensajes nuevos:\n{transcripcion}"}
+        ],
+    )
+    return response.choices[0].message.content.strip()
+
+
+# Historial de mensajes: últimos turnos textuales más un resumen de los anteriores
+conversation_history = ConversationMemory(resumir_conversacion, MODEL)
+
+
+# Almacén de splunk.json, usado mientras el recolector no tenga eventos
+splunk_json_store = None
+
+
+def store_splunk():
+    global splunk_json_store
+    store = splunk_collector.store
+    if not len(store):
+        if splunk_json_store is None:
+            with open(splunk_json_file, "r", encoding="utf-8") as file:
+                splunk_json_store = EventStore.from_events(json.load(file).get("results", []))
+        store = splunk_json_store
+    return store
+
+
+def secciones_splunk():
+    store = store_splunk()
+    # Agregados precalculados más los eventos más recientes (del más nuevo al más viejo, para que
+    # un recorte por presupuesto descarte primero los más antiguos)
+    return [
+        (PRIORITY_LIVE_DATA, "Resumen de eventos de Splunk", store.summary()),
+        (PRIORITY_EXTRA, "Eventos recientes de Splunk", store.latest(SPLUNK_CONTEXT_EVENTS)),
+    ]
+
+
+# Consultas de Meraki y Splunk disponibles para el modelo como herramientas
+herramientas = Herramientas(MERAKI_KEY, MODEL, store_splunk, indice_redes)
+
+# Síntesis con Amazon Polly por oraciones, reproducida mientras el modelo sigue respondiendo
+voz = VozPolly(AWS_REGION, POLLY_VOICE_ID)
+
+# Saludo de la persona al abrir el asistente: se reproduce directamente, sin pasar por GPT-4, y
+# desde la segunda ejecución su audio sale de la cache en disco sin llamar a Polly
+SALUDO = (
+    "Hola, soy SOPHIA, la inteligencia artificial de TXDX SECURE.",
+    "Bienvenido al Experience Operacion Center.",
+)
+threading.Thread(target=voz.hablar, args=(SALUDO,), daemon=True).start()
+
+# Respuestas a preguntas generales (CASO 1) ya contestadas; se vacía si cambia el inventario
+cache_respuestas = CacheRespuestas(indice_redes.version)
 
 
 # Function to classify a question using OpenAI
@@ -140,70 +194,101 @@ def classify_question(prompt):
         return None
 
 
+# Reglas locales antes del clasificador LLM; solo las preguntas dudosas pagan la llamada extra
+enrutador = EnrutadorPreguntas(indice_redes)
+
+
+def clasificar_pregunta(prompt):
+    """Clasifica con el enrutador local y recurre a classify_question si la confianza es baja"""
+    ruta = enrutador.enrutar(prompt)
+    print(f"Enrutador local: CASO {ruta['caso']} red={ruta['red']} confianza={ruta['confianza']} ({ruta['motivo']})")
+    if ruta["usar_llm"]:
+        inicio = time.perf_counter()
+        resultado = classify_question(prompt)
+        enrutador.registrar_latencia_llm(time.perf_counter() - inicio)
+    elif ruta["caso"] == 3:
+        resultado = f"CASO 3 - Red: {ruta['red'] or 'unknown'}"
+    else:
+        resultado = ruta["caso"]
+    print(f"Estadísticas del enrutador: {enrutador.estadisticas()}")
+    return resultado
+
+
+# Function to update the status label and the button (only from the Tk thread)
+def actualizar_estado(texto):
+    label.config(text=texto)
+    record_button.config(state=tk.DISABLED if estado == "procesando" else tk.NORMAL,
+                         text="Detener" if estado == "grabando" else "Hablar")
+
+
 # Function to start/stop recording
 def toggle_recording():
-    global recording, frames, stream, audio_interface
-    if not recording:
+    global estado
+    if estado == "listo":
         try:
-            recording = True
-            frames = []
-            audio_interface = pyaudio.PyAudio()
-            stream = audio_interface.open(format=FORMAT, channels=CHANNELS, rate=RATE, input=True,
-                                          frames_per_buffer=CHUNK)
-            print("Grabación iniciada. Puedes hablar ahora.")
-            record_audio()
+            grabador.iniciar()
+            estado = "grabando"
+            actualizar_estado("Escuchando... presiona el botón para terminar")
         except Exception as e:
             print(f"No se pudo iniciar la grabación: {e}")
-            recording = False
-    else:
+            actualizar_estado("No se pudo iniciar la grabación")
+    elif estado == "grabando":
         try:
-            recording = False
-            stream.stop_stream()
-            stream.close()
-            audio_interface.terminate()
-            print("Grabación detenida. Procesando el audio...")
-            save_audio()
+            # Si el corte automático ya terminó la grabación, solo espera al hilo de captura
+            grabador.detener()
         except Exception as e:
             print(f"No se pudo detener la grabación: {e}")
+        revisar_grabacion()
 
 
-# Function to record audio
-def record_audio():
-    global recording, frames, stream
-    if recording:
-        try:
-            data = stream.read(CHUNK, exception_on_overflow=False)
-            frames.append(data)
-            root.after(10, record_audio)
-        except Exception as e:
-            print(f"Error durante la grabación: {e}")
-            recording = False
+# Function to send a finished recording to the worker, or go back to idle if there was no voice
+def revisar_grabacion():
+    global estado
+    # Primero el fin de la grabación y después la cola: el WAV se encola antes de marcar el fin
+    termino = not grabador.grabando
+    try:
+        audio_wav = grabador.grabaciones.get_nowait()
+    except queue.Empty:
+        audio_wav = None
+    if audio_wav is not None:
+        enviar_pregunta(audio_wav)
+    elif termino:
+        estado = "listo"
+        actualizar_estado("No se detectó voz. Presiona el botón para hablar")
 
 
-# Function to save audio to a file
-def save_audio():
-    try:
-        p = pyaudio.PyAudio()
-        wf = wave.open(AUDIO_FILE, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(p.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
-        print(f"Audio guardado como {AUDIO_FILE}")
-        transcribe_and_respond()
-    except Exception as e:
-        print(f"No se pudo guardar el audio: {e}")
+# Function to queue a recorded question on the worker thread
+def enviar_pregunta(audio_wav):
+    global estado, pregunta_en_curso
+    estado = "procesando"
+    actualizar_estado("Procesando...")
+    pregunta_en_curso = procesador.submit(transcribe_and_respond, audio_wav)
+
+
+# Function polled by Tk: picks up auto-stopped recordings and re-enables the button when done
+def revisar_estado():
+    global estado
+    if estado == "grabando":
+        revisar_grabacion()
+    elif estado == "procesando" and pregunta_en_curso.done():
+        estado = "listo"
+        actualizar_estado("Presiona el botón para hablar")
+    root.after(INTERVALO_REVISION_MS, revisar_estado)
+
+
+# Captura del micrófono en su propio hilo; el audio nunca se escribe a disco y, con el corte
+# automático, la grabación termina sola cuando el usuario deja de hablar
+grabador = GrabadorAudio()
 
 
 # Function to transcribe audio using Whisper API
-def transcribe_audio():
+def transcribe_audio(audio_wav):
     url = "https://api.openai.com/v1/audio/transcriptions"
     headers = {
         "Authorization": f"Bearer {OPENAI_API_KEY}"
     }
     files = {
-        "file": (AUDIO_FILE, open(AUDIO_FILE, "rb")),
+        "file": ("mensaje.wav", audio_wav, "audio/wav"),
         "model": (None, "whisper-1")
     }
     response = requests.post(url, headers=headers, files=files)
@@ -215,52 +300,120 @@ def transcribe_audio():
         raise Exception(f"Error en la transcripción: {response.text}")
 
 
-# Function to interact with GPT-4-Turbo and maintain conversation history
-def interact_with_gpt4(prompt):
-    global conversation_history
-    conversation_history.append({"role": "user", "content": prompt})
+def _leer_stream(response, contenido):
+    """
+    Genera los fragmentos de texto de una respuesta en streaming y los agrega a contenido.
+    Devuelve las llamadas a herramientas, que llegan repartidas en varios fragmentos.
+    """
+    llamadas = {}
+    for chunk in response:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            contenido.append(delta.content)
+            yield delta.content
+        for tool_call in delta.tool_calls or []:
+            llamada = llamadas.setdefault(tool_call.index, {
+                "id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if tool_call.id:
+                llamada["id"] = tool_call.id
+            if tool_call.function and tool_call.function.name:
+                llamada["function"]["name"] += tool_call.function.name
+            if tool_call.function and tool_call.function.arguments:
+                llamada["function"]["arguments"] += tool_call.function.arguments
+    return [llamadas[indice] for indice in sorted(llamadas)]
+
+
+# Function to interact with GPT-4-Turbo and maintain conversation history.
+# Genera la respuesta por fragmentos a medida que llega, para leerla en voz alta sin esperar al final
+def interact_with_gpt4(prompt, system_context=ASSISTANT_CONTEXT):
+    conversation_history.add("user", prompt)
 
     response = client.chat.completions.create(
         model=MODEL,
         messages=[
-            {"role": "system", "content": ASSISTANT_CONTEXT},
-            *conversation_history
+            {"role": "system", "content": system_context},
+            *conversation_history.messages()
         ],
+        stream=True,
     )
-    assistant_response = response.choices[0].message.content
+    contenido = []
+    yield from _leer_stream(response, contenido)
+    assistant_response = "".join(contenido)
     print(f"Respuesta del asistente: {assistant_response}")
-    conversation_history.append({"role": "assistant", "content": assistant_response})
-    return assistant_response
-
-
-# Function to convert text to speech using Amazon Polly
-def text_to_speech_with_polly(text):
-    try:
-        polly_client = boto3.client('polly', region_name=AWS_REGION)
-        response = polly_client.synthesize_speech(
-            Text=text,
-            OutputFormat="mp3",
-            VoiceId=POLLY_VOICE_ID
-        )
-        audio_file_path = Path("response.mp3")
-        with open(audio_file_path, "wb") as audio_file:
-            audio_file.write(response['AudioStream'].read())
-        print(f"Audio guardado en {audio_file_path}")
-        os.system(f"start {audio_file_path}" if os.name == 'nt' else f"open {audio_file_path}")
-    except Exception as e:
-        print(f"Error en TTS con Amazon Polly: {e}")
-
-
-# Cargar el archivo JSON de organizaciones y redes
-def cargar_organizaciones_y_redes():
-    with open("organizations_and_networks.json", "r") as file:
-        return json.load(file)
+    conversation_history.add("assistant", assistant_response)
+    # Resumir los turnos antiguos mientras el usuario escucha la respuesta
+    conversation_history.compact()
+
+
+# Function to answer in a single round trip, letting the model call the Meraki/Splunk tools.
+# También genera la respuesta por fragmentos; las rondas de herramientas no producen audio
+def responder_con_herramientas(prompt, system_context=ASSISTANT_CONTEXT):
+    conversation_history.add("user", prompt)
+    messages = [{"role": "system", "content": system_context}, *conversation_history.messages()]
+
+    respuesta = []
+    for ronda in range(MAX_RONDAS_HERRAMIENTAS + 1):
+        # Se agotaron las rondas: la última petición va sin herramientas y obliga a responder
+        opciones = {"tools": herramientas.definiciones} if ronda < MAX_RONDAS_HERRAMIENTAS else {}
+        response = client.chat.completions.create(model=MODEL, messages=messages, stream=True, **opciones)
+        contenido = []
+        llamadas = yield from _leer_stream(response, contenido)
+        respuesta += contenido
+        if not llamadas:
+            break
+        # Los resultados de las herramientas solo viven en esta petición; el historial guarda la respuesta final
+        messages.append({"role": "assistant", "content": "".join(contenido) or None, "tool_calls": llamadas})
+        for llamada in llamadas:
+            messages.append({
+                "role": "tool",
+                "tool_call_id": llamada["id"],
+                "content": herramientas.ejecutar(llamada["function"]["name"], llamada["function"]["arguments"])
+            })
+
+    assistant_response = "".join(respuesta)
+    print(f"Respuesta del asistente: {assistant_response}")
+    conversation_history.add("assistant", assistant_response)
+    conversation_history.compact()
 
 
-def transcribe_and_respond():
+def transcribe_and_respond(audio_wav):
     try:
-        prompt = transcribe_audio()
-        case_number = classify_question(prompt)
+        prompt = transcribe_audio(audio_wav)
+        # Las respuestas con historial previo pueden depender de él: esas no se guardan en la cache
+        sin_historial = conversation_history.is_empty()
+
+        # Pregunta general repetida: texto y audio salen de las caches, sin clasificar ni llamar a GPT-4
+        oraciones = cache_respuestas.obtener(prompt)
+        if oraciones is not None:
+            print(f"Respuesta desde la cache: {cache_respuestas.estadisticas()}")
+            voz.hablar(oraciones)
+            conversation_history.add("user", prompt)
+            conversation_history.add("assistant", " ".join(oraciones))
+            conversation_history.compact()
+            return
+
+        if MODO_HERRAMIENTAS:
+            # Una sola ronda: el modelo decide si necesita consultar Meraki o Splunk
+            secciones = [(PRIORITY_INVENTORY, "Organizaciones y redes disponibles", indice_redes.organizaciones())]
+            # Si el enrutador está seguro, los datos van en el contexto y el modelo no gasta una ronda
+            ruta = enrutador.enrutar(prompt)
+            if not ruta["usar_llm"] and ruta["caso"] == 2:
+                secciones += secciones_splunk()
+            elif not ruta["usar_llm"] and ruta["caso"] == 3 and ruta["red"]:
+                secciones.append((PRIORITY_LIVE_DATA, f"Datos de la red {ruta['red']}",
+                                  herramientas.consultar_red_meraki(ruta["red"])))
+            system_context = context_builder.build(secciones)
+            llamadas_previas = herramientas.llamadas
+            oraciones = voz.hablar(dividir_en_oraciones(responder_con_herramientas(prompt, system_context)))
+            # Solo se guardan respuestas generales que no necesitaron datos en tiempo real
+            if (sin_historial and not ruta["usar_llm"] and ruta["caso"] == 1
+                    and herramientas.llamadas == llamadas_previas):
+                cache_respuestas.guardar(prompt, oraciones)
+            return
+
+        case_number = clasificar_pregunta(prompt)
 
         # Verificar si el caso es "CASO 3 - Red:" y obtener el nombre de la red
         red_name = "unknown"  # Valor por defecto para red_name
@@ -269,38 +422,30 @@ def transcribe_and_respond():
             case_number = 3  # Asignar el valor de case_number a 3
             print(f"Red clasificada: {red_name}")
 
-        # Si es CASO 3 y la red no es 'unknown', obtener los valores de org_id y network_id
-        if case_number == 3 and red_name != "unknown":
-            # Cargar el JSON de organizaciones y redes
-            organizaciones_y_redes = cargar_organizaciones_y_redes()
-
-            # Buscar la organización y la red
-            for org in organizaciones_y_redes:
-                for network in org['networks']:
-                    if network['name'] == red_name:
-                        ORGANIZATION_ID = org['org_id']
-                        NETWORK_ID = network['network_id']
-                        print(f"ORGANIZATION_ID: {ORGANIZATION_ID}")
-                        print(f"NETWORK_ID: {NETWORK_ID}")
-                        break
-
-        # Definir el contexto en función del caso
-        global ASSISTANT_CONTEXT
-        if case_number == 1:
-            ASSISTANT_CONTEXT += additional_context
-        elif case_number == 2:
-            ASSISTANT_CONTEXT = agregar_json_al_contexto(splunk_json_file, ASSISTANT_CONTEXT)
-        elif case_number == 3:
-            # FALTA LLAMAR A LA FUNCION DE MERAKI_UTILS
-            print(f"Organization ID{ORGANIZATION_ID}")
-            obtener_datos_red(MERAKI_KEY, ORGANIZATION_ID, NETWORK_ID)
-            ASSISTANT_CONTEXT = agregar_json_al_contexto(meraki_json_file, ASSISTANT_CONTEXT)
-
-        # Interactuar con GPT-4 y obtener la respuesta
-        response = interact_with_gpt4(prompt)
-
-        # Convertir la respuesta a voz
-        text_to_speech_with_polly(response)
+        # Si es CASO 3 y la red no es 'unknown', resolverla en el índice (tolera nombres mal transcritos)
+        red = indice_redes.resolver(red_name) if case_number == 3 and red_name != "unknown" else None
+        if red is not None:
+            red_name = red["name"]
+            print(f"ORGANIZATION_ID: {red['org_id']}")
+            print(f"NETWORK_ID: {red['network_id']}")
+        elif case_number == 3 and red_name != "unknown":
+            print(f"La red '{red_name}' no está en el inventario.")
+
+        # Armar un contexto nuevo para esta pregunta con solo las secciones relevantes
+        secciones = [(PRIORITY_INVENTORY, "Organizaciones y redes disponibles", indice_redes.organizaciones())]
+        if case_number == 2:
+            secciones += secciones_splunk()
+        elif case_number == 3 and red is not None:
+            # Los datos se sirven desde la cache en memoria; no se escribe ni se relee network_data.json
+            datos_red = obtener_datos_red(MERAKI_KEY, red["org_id"], red["network_id"], output_file=None,
+                                          concurrente=True, usar_cache=True, modo_bulk=True)
+            secciones.append((PRIORITY_LIVE_DATA, f"Datos de la red {red_name}", datos_red))
+        system_context = context_builder.build(secciones)
+
+        # Leer la respuesta en voz alta oración por oración mientras GPT-4 la sigue generando
+        oraciones = voz.hablar(dividir_en_oraciones(interact_with_gpt4(prompt, system_context)))
+        if case_number == 1 and sin_historial:
+            cache_respuestas.guardar(prompt, oraciones)
 
     except Exception as e:
         print(f"Error en el flujo de transcripción y respuesta: {e}")
@@ -313,4 +458,5 @@ label = tk.Label(root, text="Presiona el botón para hablar")
 label.pack(pady=10)
 record_button = tk.Button(root, text="Hablar", command=toggle_recording)
 record_button.pack(pady=20)
+root.after(INTERVALO_REVISION_MS, revisar_estado)
 root.mainloop()
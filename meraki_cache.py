@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Tiempo de vida en segundos de cada sección de network_data
+TTL_POR_SECCION = {
+    "devices_status": 30,
+    "clients_data": 60,
+    "firewall_rules": 600,
+    "vlans": 600,
+    "ssids": 600,
+    "estados_dispositivos_org": 30,  # Índice por organización, guardado con el org_id como clave
+    "dispositivos_red": 600,  # Lista de dispositivos de la red (getNetworkDevices), cambia poco
+}
+TTL_POR_DEFECTO = 60
+
+# Una entrada vencida se sigue sirviendo (mientras se refresca en segundo plano)
+# hasta que su edad supera ttl * FACTOR_OBSOLETO
+FACTOR_OBSOLETO = 2.0
+
+MAX_ENTRADAS = 256
+
+
+class _Entrada:
+    __slots__ = ("valor", "creado")
+
+    def __init__(self, valor, creado):
+        self.valor = valor
+        self.creado = creado
+
+
+class CacheRedes:
+    """
+    Cache en memoria de las secciones de una red de Meraki, con clave (network_id, sección).
+
+    Cada sección tiene su propio TTL. Una entrada vencida pero dentro de la ventana obsoleta
+    se devuelve de inmediato y se refresca en un hilo aparte (stale-while-revalidate). Cuando
+    se supera ``max_entradas`` se descarta la entrada usada hace más tiempo (LRU).
+    Es segura para usarse desde varios hilos y con varias redes a la vez.
+    """
+
+    def __init__(self, ttl_por_seccion=None, max_entradas=MAX_ENTRADAS, factor_obsoleto=FACTOR_OBSOLETO):
+        """
+        :param ttl_por_seccion: Diccionario {sección: segundos} que reemplaza a TTL_POR_SECCION (opcional).
+        :param max_entradas: Número máximo de entradas antes de expulsar por LRU (opcional).
+        :param factor_obsoleto: Múltiplo del TTL hasta el que se sirve una entrada vencida (opcional).
+        """
+        self.ttl_por_seccion = dict(TTL_POR_SECCION, **(ttl_por_seccion or {}))
+        self.max_entradas = max_entradas
+        self.factor_obsoleto = factor_obsoleto
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._cargas = {}  # Un lock por clave para que una sola llamada cargue cada sección
+        self._refrescando = set()
+        self.aciertos = 0
+        self.obsoletos = 0
+        self.fallos = 0
+
+    def _ttl(self, seccion):
+        return self.ttl_por_seccion.get(seccion, TTL_POR_DEFECTO)
+
+    def _guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = _Entrada(valor, time.monotonic())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                expulsada, _ = self._entradas.popitem(last=False)
+                self._cargas.pop(expulsada, None)
+
+    def _refrescar(self, clave, cargador):
+        try:
+            self._guardar(clave, cargador())
+        except Exception as e:
+            print(f"Error al refrescar {clave} en segundo plano: {e}")
+        finally:
+            with self._lock:
+                self._refrescando.discard(clave)
+
+    def obtener(self, network_id, seccion, cargador, cargador_refresco=None):
+        """
+        Devuelve la sección de la red desde la cache o la carga con ``cargador``.
+
+        :param network_id: ID de la red.
+        :param seccion: Nombre de la sección (devices_status, vlans, ...).
+        :param cargador: Función sin argumentos que obtiene el valor desde la API.
+        :param cargador_refresco: Función usada para los refrescos en segundo plano (por defecto ``cargador``).
+        :return: Valor de la sección. Es el mismo objeto guardado en la cache; no debe modificarse.
+        """
+        clave = (network_id, seccion)
+        ttl = self._ttl(seccion)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                edad = time.monotonic() - entrada.creado
+                if edad < ttl:
+                    self.aciertos += 1
+                    return entrada.valor
+                if edad < ttl * self.factor_obsoleto:
+                    self.obsoletos += 1
+                    if clave not in self._refrescando:
+                        self._refrescando.add(clave)
+                        threading.Thread(target=self._refrescar,
+                                         args=(clave, cargador_refresco or cargador),
+                                         daemon=True).start()
+                    return entrada.valor
+            lock_carga = self._cargas.setdefault(clave, threading.Lock())
+
+        with lock_carga:
+            # Otro hilo pudo haber cargado la sección mientras se esperaba el lock
+            with self._lock:
+                entrada = self._entradas.get(clave)
+                if entrada is not None and time.monotonic() - entrada.creado < ttl:
+                    self.aciertos += 1
+                    return entrada.valor
+                self.fallos += 1
+            valor = cargador()
+            self._guardar(clave, valor)
+            return valor
+
+    def refrescar(self, network_id, seccion, cargador):
+        """
+        Carga la sección con ``cargador`` y la guarda sin consultar la cache; la usan los
+        refrescos periódicos para que la entrada nunca llegue a vencer.
+
+        :return: Valor cargado.
+        """
+        valor = cargador()
+        self._guardar((network_id, seccion), valor)
+        return valor
+
+    def invalidar(self, network_id=None, seccion=None):
+        """Elimina las entradas de una red, de una sección o todas si no se indica ninguna."""
+        with self._lock:
+            for clave in list(self._entradas):
+                if (network_id is None or clave[0] == network_id) and (seccion is None or clave[1] == seccion):
+                    del self._entradas[clave]
+
+    def estadisticas(self):
+        """Devuelve el número de entradas y los contadores de aciertos, obsoletos y fallos."""
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "obsoletos": self.obsoletos,
+                "fallos": self.fallos,
+            }
+
+
+# Instancia compartida por todas las consultas de meraki_utils
+cache_redes = CacheRedes()
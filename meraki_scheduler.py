@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+import types
+
+# Prioridades: un número menor se atiende primero
+PRIORIDAD_INTERACTIVA = 0  # Preguntas de voz en curso
+PRIORIDAD_NORMAL = 5
+PRIORIDAD_SEGUNDO_PLANO = 10  # Refrescos de inventario y tareas en background
+
+# Meraki limita cada organización a 10 llamadas por segundo
+LLAMADAS_POR_SEGUNDO = float(os.getenv("MERAKI_LLAMADAS_POR_SEGUNDO", "10"))
+
+# Clave usada para llamadas que no pertenecen a una organización (getOrganizations)
+ORG_GLOBAL = "global"
+
+
+class _CuentaOrganizacion:
+    """Token bucket, cola de espera y contadores de una organización."""
+
+    def __init__(self, tasa, capacidad):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = capacidad
+        self.ultima_recarga = time.monotonic()
+        self.espera = []  # heap de turnos (prioridad, secuencia)
+        self.llamadas = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.profundidad_maxima = 0
+
+    def recargar(self, ahora):
+        transcurrido = ahora - self.ultima_recarga
+        self.tokens = min(self.capacidad, self.tokens + transcurrido * self.tasa)
+        self.ultima_recarga = ahora
+
+
+class PlanificadorMeraki:
+    """
+    Planificador compartido de llamadas a la Dashboard API de Meraki.
+
+    Cada organización tiene su propio token bucket; cuando no hay tokens disponibles las
+    llamadas esperan en una cola ordenada por prioridad y, dentro de la misma prioridad,
+    por orden de llegada.
+    """
+
+    def __init__(self, llamadas_por_segundo=LLAMADAS_POR_SEGUNDO, rafaga=None):
+        """
+        :param llamadas_por_segundo: Llamadas permitidas por segundo y por organización.
+        :param rafaga: Máximo de llamadas seguidas sin esperar (por defecto igual a la tasa).
+        """
+        self.llamadas_por_segundo = llamadas_por_segundo
+        self.rafaga = rafaga if rafaga is not None else max(1.0, llamadas_por_segundo)
+        self._condicion = threading.Condition()
+        self._cuentas = {}
+        self._secuencia = itertools.count()
+
+    def _cuenta(self, org_id):
+        clave = org_id if org_id is not None else ORG_GLOBAL
+        cuenta = self._cuentas.get(clave)
+        if cuenta is None:
+            cuenta = _CuentaOrganizacion(self.llamadas_por_segundo, self.rafaga)
+            self._cuentas[clave] = cuenta
+        return cuenta
+
+    def adquirir(self, org_id, prioridad=PRIORIDAD_NORMAL):
+        """
+        Bloquea hasta que la organización tenga un token disponible y sea el turno de la llamada.
+
+        :param org_id: ID de la organización (None para llamadas globales).
+        :param prioridad: Prioridad de la llamada (menor se atiende antes).
+        :return: Segundos que la llamada esperó en la cola.
+        """
+        inicio = time.monotonic()
+        with self._condicion:
+            cuenta = self._cuenta(org_id)
+            turno = (prioridad, next(self._secuencia))
+            heapq.heappush(cuenta.espera, turno)
+            cuenta.profundidad_maxima = max(cuenta.profundidad_maxima, len(cuenta.espera))
+            while True:
+                cuenta.recargar(time.monotonic())
+                if cuenta.espera[0] == turno:
+                    if cuenta.tokens >= 1:
+                        heapq.heappop(cuenta.espera)
+                        cuenta.tokens -= 1
+                        break
+                    # Primer turno de la cola: esperar justo lo necesario para el siguiente token
+                    self._condicion.wait((1 - cuenta.tokens) / cuenta.tasa)
+                else:
+                    self._condicion.wait()
+            espera = time.monotonic() - inicio
+            cuenta.llamadas += 1
+            cuenta.espera_total += espera
+            cuenta.espera_maxima = max(cuenta.espera_maxima, espera)
+            # Despertar al siguiente turno para que recalcule su espera
+            self._condicion.notify_all()
+        return espera
+
+    def ejecutar(self, org_id, funcion, *args, prioridad=PRIORIDAD_NORMAL, **kwargs):
+        """
+        Espera un token de la organización y ejecuta ``funcion(*args, **kwargs)``.
+
+        Con ``use_iterator_for_get_pages=True`` las llamadas paginadas del SDK devuelven un
+        generador que pide cada página recién al iterarlo; en ese caso el resultado se envuelve
+        para que cada página después de la primera también espere su token.
+        """
+        self.adquirir(org_id, prioridad)
+        resultado = funcion(*args, **kwargs)
+        if not isinstance(resultado, types.GeneratorType):
+            return resultado
+        por_pagina = kwargs.get("perPage")
+        if not por_pagina:
+            # Sin perPage no se sabe cuándo el SDK pide la siguiente página: se leen todas dentro
+            # de esta llamada planificada (las de meraki_utils siempre indican perPage)
+            return list(resultado)
+        return self._paginar(org_id, resultado, por_pagina, prioridad)
+
+    def _paginar(self, org_id, generador, por_pagina, prioridad):
+        """Recorre el generador del SDK adquiriendo un token antes de cada página nueva"""
+        for i, elemento in enumerate(generador, start=1):
+            yield elemento
+            if i % por_pagina == 0:
+                # El siguiente next() del SDK dispara la petición de la próxima página
+                self.adquirir(org_id, prioridad)
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores de cada organización.
+
+        :return: Diccionario {org_id: {en_cola, profundidad_maxima, llamadas, espera_total_s,
+                 espera_media_s, espera_maxima_s}}.
+        """
+        with self._condicion:
+            return {
+                org_id: {
+                    "en_cola": len(cuenta.espera),
+                    "profundidad_maxima": cuenta.profundidad_maxima,
+                    "llamadas": cuenta.llamadas,
+                    "espera_total_s": round(cuenta.espera_total, 3),
+                    "espera_media_s": round(cuenta.espera_total / cuenta.llamadas, 3) if cuenta.llamadas else 0.0,
+                    "espera_maxima_s": round(cuenta.espera_maxima, 3),
+                }
+                for org_id, cuenta in self._cuentas.items()
+            }
+
+
+class _SeccionPlanificada:
+    """Envuelve una sección del SDK (networks, devices, ...) para planificar sus métodos."""
+
+    def __init__(self, seccion, planificador, org_id, prioridad):
+        self._seccion = seccion
+        self._planificador = planificador
+        self._org_id = org_id
+        self._prioridad = prioridad
+
+    def __getattr__(self, nombre):
+        metodo = getattr(self._seccion, nombre)
+
+        def llamada(*args, **kwargs):
+            return self._planificador.ejecutar(self._org_id, metodo, *args, prioridad=self._prioridad, **kwargs)
+
+        return llamada
+
+
+class DashboardPlanificado:
+    """
+    Envoltorio de ``meraki.DashboardAPI`` cuyas llamadas pasan por un planificador.
+
+    Se usa igual que el dashboard original (``dashboard.networks.getNetworkDevices(...)``).
+    Las llamadas paginadas consumen un token por página, también cuando el SDK las pide de a
+    una al iterar el resultado.
+    """
+
+    def __init__(self, dashboard, org_id, prioridad=PRIORIDAD_NORMAL, planificador=None):
+        self._dashboard = dashboard
+        self._org_id = org_id
+        self._prioridad = prioridad
+        self._planificador = planificador or planificador_compartido
+
+    def __getattr__(self, nombre):
+        return _SeccionPlanificada(getattr(self._dashboard, nombre), self._planificador,
+                                   self._org_id, self._prioridad)
+
+
+# Instancia compartida por todas las llamadas de meraki_utils
+planificador_compartido = PlanificadorMeraki()
@@ -1,130 +1,472 @@
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import meraki
 
-def listar_organizaciones_y_redes(api_key, output_file="organizations_and_networks.json"):
+from meraki_cache import cache_redes
+from meraki_scheduler import DashboardPlanificado, PRIORIDAD_INTERACTIVA, PRIORIDAD_SEGUNDO_PLANO
+
+# Límite por defecto de llamadas simultáneas en la recolección concurrente
+MAX_WORKERS_POR_DEFECTO = 8
+
+# Tamaño de página para getOrganizationDevicesStatuses (máximo permitido por la API)
+PAGINA_ESTADOS = 1000
+
+# Tamaño de página para getNetworkClients (máximo permitido por la API)
+PAGINA_CLIENTES = 1000
+
+
+def listar_organizaciones_y_redes(api_key, output_file="organizations_and_networks.json",
+                                  prioridad=PRIORIDAD_SEGUNDO_PLANO):
     """
     Lista las organizaciones disponibles y sus redes automáticamente.
     Guarda los datos en un archivo JSON en la misma carpeta y retorna la lista de organizaciones con redes.
 
     :param api_key: Clave de API de Meraki
     :param output_file: Nombre del archivo JSON donde se guardarán los datos (opcional)
+    :param prioridad: Prioridad de las llamadas en el planificador de Meraki (opcional)
     :return: Lista de organizaciones con sus redes
     """
-    dashboard = meraki.DashboardAPI(api_key)
+    organizaciones, _ = descubrir_inventario(api_key, output_file, prioridad=prioridad)
+    print("Organizaciones disponibles:")
+    for org in organizaciones:
+        print(f"- {org['name']} (ID: {org['org_id']})")
+        print(f"Redes disponibles en la organización {org['name']}:")
+        for net in org['networks']:
+            print(f"  - {net['name']} (ID: {net['network_id']})")
+    return organizaciones
+
+
+def cargar_inventario(output_file="organizations_and_networks.json"):
+    """
+    Lee el inventario de organizaciones y redes guardado previamente.
+
+    :param output_file: Archivo JSON del inventario (opcional).
+    :return: Lista de organizaciones con sus redes, o una lista vacía si el archivo no existe o no es válido.
+    """
     try:
-        # Listar todas las organizaciones
-        orgs = dashboard.organizations.getOrganizations()
-        print("Organizaciones disponibles:")
-        organizaciones = []
-
-        for org in orgs:
-            print(f"- {org['name']} (ID: {org['id']})")
-
-            # Listar las redes de la organización
-            networks = dashboard.organizations.getOrganizationNetworks(org['id'])
-            print(f"Redes disponibles en la organización {org['name']}:")
-            redes = []
-            for net in networks:
-                print(f"  - {net['name']} (ID: {net['id']})")
-                redes.append({
-                    "network_id": net['id'],
-                    "name": net['name']
-                })
-            organizaciones.append({
-                "org_id": org['id'],
-                "name": org['name'],
-                "networks": redes
-            })
+        with open(output_file, "r", encoding="utf-8") as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return []
 
-        # Guardar la información en un archivo JSON
-        with open(output_file, "w") as json_file:
-            json.dump(organizaciones, json_file, indent=2)
 
-        print(f"\nSe ha guardado la información en '{output_file}'.")
-        return organizaciones
+def comparar_inventarios(anterior, nuevo):
+    """
+    Compara dos inventarios de organizaciones y redes.
+
+    :param anterior: Inventario previo (lista de organizaciones).
+    :param nuevo: Inventario recién descubierto.
+    :return: Diccionario con las organizaciones y redes agregadas, eliminadas y renombradas.
+             Todas las listas vacías indican que no hubo cambios.
+    """
+    def indexar(inventario):
+        orgs = {org["org_id"]: org["name"] for org in inventario}
+        redes = {
+            net["network_id"]: (org["org_id"], net["name"])
+            for org in inventario for net in org.get("networks", [])
+        }
+        return orgs, redes
+
+    orgs_antes, redes_antes = indexar(anterior)
+    orgs_ahora, redes_ahora = indexar(nuevo)
+    return {
+        "organizaciones_agregadas": [orgs_ahora[o] for o in orgs_ahora.keys() - orgs_antes.keys()],
+        "organizaciones_eliminadas": [orgs_antes[o] for o in orgs_antes.keys() - orgs_ahora.keys()],
+        "organizaciones_renombradas": [
+            (orgs_antes[o], orgs_ahora[o])
+            for o in orgs_ahora.keys() & orgs_antes.keys()
+            if orgs_antes[o] != orgs_ahora[o]
+        ],
+        "redes_agregadas": [redes_ahora[n][1] for n in redes_ahora.keys() - redes_antes.keys()],
+        "redes_eliminadas": [redes_antes[n][1] for n in redes_antes.keys() - redes_ahora.keys()],
+        "redes_renombradas": [
+            (redes_antes[n][1], redes_ahora[n][1])
+            for n in redes_ahora.keys() & redes_antes.keys()
+            if redes_antes[n] != redes_ahora[n]
+        ],
+    }
+
+
+def descubrir_inventario(api_key, output_file="organizations_and_networks.json",
+                         max_workers=MAX_WORKERS_POR_DEFECTO, prioridad=PRIORIDAD_SEGUNDO_PLANO):
+    """
+    Descubre las redes de todas las organizaciones en paralelo y actualiza el inventario guardado.
 
+    El archivo solo se reescribe cuando comparar_inventarios encuentra cambios (el orden en que la
+    API devuelve organizaciones y redes no cuenta); si la API falla se conserva y se devuelve el
+    inventario previo.
+
+    :param api_key: Clave de API de Meraki.
+    :param output_file: Archivo JSON del inventario (opcional).
+    :param max_workers: Organizaciones consultadas a la vez (opcional).
+    :param prioridad: Prioridad de las llamadas en el planificador de Meraki (opcional).
+    :return: Tupla (organizaciones, cambios) donde cambios es el resultado de comparar_inventarios.
+    """
+    anterior = cargar_inventario(output_file)
+    dashboard = meraki.DashboardAPI(api_key, log_path=None)
+
+    def listar_redes(org):
+        dashboard_org = DashboardPlanificado(dashboard, org['id'], prioridad)
+        networks = dashboard_org.organizations.getOrganizationNetworks(org['id'], total_pages="all")
+        return {
+            "org_id": org['id'],
+            "name": org['name'],
+            "networks": [{"network_id": net['id'], "name": net['name']} for net in networks]
+        }
+
+    try:
+        orgs = DashboardPlanificado(dashboard, None, prioridad).organizations.getOrganizations()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(orgs)))) as executor:
+            organizaciones = list(executor.map(listar_redes, orgs))
     except meraki.APIError as e:
         print(f"Error en la API de Meraki: {e.message}")
-        return []
+        return anterior, {}
     except Exception as e:
         print(f"Error inesperado: {e}")
-        return []
+        return anterior, {}
+
+    cambios = comparar_inventarios(anterior, organizaciones)
+    if any(cambios.values()):
+        # Escritura atómica para que los lectores nunca vean un archivo a medio escribir
+        temporal = f"{output_file}.tmp"
+        with open(temporal, "w") as json_file:
+            json.dump(organizaciones, json_file, indent=2)
+        os.replace(temporal, output_file)
+        print(f"\nSe ha actualizado el inventario en '{output_file}': "
+              + ", ".join(f"{clave}={len(valor)}" for clave, valor in cambios.items() if valor))
+    else:
+        print(f"\nEl inventario en '{output_file}' no tiene cambios.")
+    return organizaciones, cambios
+
+
+def descubrir_inventario_en_segundo_plano(api_key, output_file="organizations_and_networks.json",
+                                          al_cambiar=None, **kwargs):
+    """
+    Ejecuta descubrir_inventario en un hilo daemon para no bloquear el arranque.
+
+    :param api_key: Clave de API de Meraki.
+    :param output_file: Archivo JSON del inventario (opcional).
+    :param al_cambiar: Función (organizaciones, cambios) llamada cuando el inventario cambió (opcional).
+    :param kwargs: Argumentos adicionales para descubrir_inventario.
+    :return: El hilo iniciado.
+    """
+    def tarea():
+        organizaciones, cambios = descubrir_inventario(api_key, output_file, **kwargs)
+        if al_cambiar and any(cambios.values()):
+            al_cambiar(organizaciones, cambios)
+
+    hilo = threading.Thread(target=tarea, name="descubrimiento-meraki", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def _recolectar_dispositivos(dashboard, network_id, max_workers=1):
+    """
+    Obtiene el estado de los dispositivos de la red.
+
+    Con ``max_workers`` mayor a 1 las llamadas ``getDevice`` se reparten en un pool de hilos.
+    """
+    devices = dashboard.networks.getNetworkDevices(network_id)
+
+    def estado(device):
+        status = dashboard.devices.getDevice(device['serial'])
+        return {
+            "name": device.get("name", "N/A"),
+            "model": device.get("model", "N/A"),
+            "serial": device.get("serial", "N/A"),
+            "firmware": device.get("firmware", "N/A"),
+            "connection_status": status.get("status", "unknown"),
+            "uptime": status.get("uptime", "N/A"),
+            "ports_status": status.get("portStatus", "N/A")
+        }
+
+    if max_workers <= 1 or len(devices) <= 1:
+        return [estado(device) for device in devices]
+    # executor.map conserva el orden original de los dispositivos
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(devices))) as executor:
+        return list(executor.map(estado, devices))
+
+
+def _indice_estados_org(dashboard, org_id, usar_cache=False, refrescar=False):
+    """
+    Construye el índice {network_id: {serial: estado}} de todos los dispositivos de la organización.
+
+    Usa una sola llamada paginada a ``getOrganizationDevicesStatuses``; con un dashboard creado con
+    ``use_iterator_for_get_pages=True`` las páginas se procesan a medida que llegan. Con
+    ``refrescar`` siempre se consulta la API y el resultado reemplaza al de la cache.
+    """
+    def cargar():
+        indice = {}
+        estados = dashboard.organizations.getOrganizationDevicesStatuses(
+            org_id, total_pages="all", perPage=PAGINA_ESTADOS)
+        for estado in estados:
+            indice.setdefault(estado.get("networkId"), {})[estado.get("serial")] = {
+                "name": estado.get("name"),
+                "model": estado.get("model"),
+                "product_type": estado.get("productType"),
+                "status": estado.get("status", "unknown"),
+                "last_reported_at": estado.get("lastReportedAt"),
+                "lan_ip": estado.get("lanIp"),
+                "public_ip": estado.get("publicIp"),
+            }
+        return indice
+
+    # La entrada se guarda con el org_id en lugar del network_id: la comparten todas sus redes
+    if refrescar:
+        return cache_redes.refrescar(org_id, "estados_dispositivos_org", cargar)
+    if not usar_cache:
+        return cargar()
+    return cache_redes.obtener(org_id, "estados_dispositivos_org", cargar)
+
+
+def _dispositivos_red(dashboard, network_id, usar_cache=False):
+    """Lista de dispositivos de la red; cambia poco, así que en la cache tiene su propio TTL"""
+    def cargar():
+        return dashboard.networks.getNetworkDevices(network_id)
+
+    if not usar_cache:
+        return cargar()
+    return cache_redes.obtener(network_id, "dispositivos_red", cargar)
 
 
-def obtener_datos_red(api_key, org_id, network_id, output_file="network_data.json"):
+def obtener_estados_dispositivos_org(api_key, org_id, prioridad=PRIORIDAD_INTERACTIVA, usar_cache=True):
+    """
+    Obtiene el estado en vivo de todos los dispositivos de una organización con una sola llamada paginada.
+
+    :param api_key: Clave de API de Meraki.
+    :param org_id: ID de la organización.
+    :param prioridad: Prioridad de la llamada en el planificador de Meraki (opcional).
+    :param usar_cache: Si es True, reutiliza el índice guardado en la cache compartida (opcional).
+    :return: Diccionario {network_id: {serial: estado}}.
+    """
+    dashboard_api = meraki.DashboardAPI(api_key, log_path=None, use_iterator_for_get_pages=True)
+    dashboard = DashboardPlanificado(dashboard_api, org_id, prioridad)
+    try:
+        return _indice_estados_org(dashboard, org_id, usar_cache)
+    except meraki.APIError as e:
+        print(f"Error en la API de Meraki: {e.message}")
+        return {}
+
+
+def refrescar_estados_org(api_key, org_id, network_ids=(), prioridad=PRIORIDAD_SEGUNDO_PLANO):
+    """
+    Mantiene caliente en la cache todo lo que necesita el estado de dispositivos en modo bulk.
+
+    El índice de estados de la organización se vuelve a consultar siempre; las listas de
+    dispositivos de cada red solo cuando vencen. Llamada con un intervalo menor que el TTL de
+    ``estados_dispositivos_org``, las preguntas sobre dispositivos no esperan a la API.
+
+    :param api_key: Clave de API de Meraki.
+    :param org_id: ID de la organización.
+    :param network_ids: IDs de las redes cuyas listas de dispositivos se mantienen en la cache (opcional).
+    :param prioridad: Prioridad de las llamadas en el planificador de Meraki (opcional).
+    """
+    dashboard_api = meraki.DashboardAPI(api_key, log_path=None, use_iterator_for_get_pages=True)
+    dashboard = DashboardPlanificado(dashboard_api, org_id, prioridad)
+    try:
+        _indice_estados_org(dashboard, org_id, refrescar=True)
+        for network_id in network_ids:
+            _dispositivos_red(dashboard, network_id, usar_cache=True)
+    except meraki.APIError as e:
+        print(f"Error en la API de Meraki: {e.message}")
+
+
+def _recolectar_dispositivos_bulk(dashboard, network_id, org_id, usar_cache=False):
+    """Obtiene el estado de los dispositivos de la red desde el índice de estados de la organización."""
+    devices = _dispositivos_red(dashboard, network_id, usar_cache)
+    estados = _indice_estados_org(dashboard, org_id, usar_cache).get(network_id, {})
+    devices_status = []
+    for device in devices:
+        status = estados.get(device.get("serial"), {})
+        devices_status.append({
+            "name": device.get("name", "N/A"),
+            "model": device.get("model", "N/A"),
+            "serial": device.get("serial", "N/A"),
+            "firmware": device.get("firmware", "N/A"),
+            "connection_status": status.get("status", "unknown"),
+            "uptime": "N/A",
+            "ports_status": "N/A"
+        })
+    return devices_status
+
+
+def _iterar_clientes(dashboard, network_id, timespan=None, agregados=None):
+    """
+    Genera los clientes de la red página por página con solo los campos proyectados.
+
+    Si se pasa ``agregados`` (un diccionario), se actualiza en cada cliente con el conteo y el uso
+    total en KB por SSID: {ssid: {"clientes": n, "uso_kb": total}}.
+    """
+    parametros = {"total_pages": "all", "perPage": PAGINA_CLIENTES}
+    if timespan is not None:
+        parametros["timespan"] = timespan
+    for client in dashboard.networks.getNetworkClients(network_id, **parametros):
+        usage = client.get("usage") or {}
+        proyectado = {
+            "ip": client.get("ip", "N/A"),
+            "description": client.get("description", "N/A"),
+            "ssid": client.get("ssid", "N/A"),
+            "uptime": client.get("uptime", "N/A"),
+            "usage": usage
+        }
+        if agregados is not None:
+            resumen = agregados.setdefault(proyectado["ssid"], {"clientes": 0, "uso_kb": 0})
+            resumen["clientes"] += 1
+            resumen["uso_kb"] += (usage.get("sent") or 0) + (usage.get("recv") or 0)
+        yield proyectado
+
+
+def iterar_clientes_red(api_key, org_id, network_id, timespan=None, agregados=None,
+                        prioridad=PRIORIDAD_INTERACTIVA):
+    """
+    Recorre los clientes de una red sin cargarlos todos en memoria.
+
+    Las páginas se piden a la API a medida que se consume el generador, por lo que la memoria
+    se mantiene constante aun en sitios con decenas de miles de clientes.
+
+    :param api_key: Clave de API de Meraki.
+    :param org_id: ID de la organización.
+    :param network_id: ID de la red.
+    :param timespan: Ventana en segundos hacia atrás a consultar (opcional, por defecto la de la API).
+    :param agregados: Diccionario que se completa con el conteo y uso por SSID (opcional).
+    :param prioridad: Prioridad de las llamadas en el planificador de Meraki (opcional).
+    :return: Generador de diccionarios con ip, description, ssid, uptime y usage.
+    """
+    dashboard_api = meraki.DashboardAPI(api_key, log_path=None, use_iterator_for_get_pages=True)
+    dashboard = DashboardPlanificado(dashboard_api, org_id, prioridad)
+    yield from _iterar_clientes(dashboard, network_id, timespan, agregados)
+
+
+def _recolectar_clientes(dashboard, network_id):
+    """Lista los clientes conectados a los puntos de acceso."""
+    return list(_iterar_clientes(dashboard, network_id))
+
+
+def _recolectar_firewall(dashboard, network_id):
+    """Obtiene las reglas de firewall L3 de un dispositivo MX."""
+    return dashboard.appliance.getNetworkApplianceFirewallL3FirewallRules(network_id)
+
+
+def _recolectar_vlans(dashboard, network_id):
+    """Lista las VLANs configuradas en la red."""
+    return dashboard.appliance.getNetworkApplianceVlans(network_id)
+
+
+def _recolectar_ssids(dashboard, network_id):
+    """Lista los SSIDs configurados en los puntos de acceso."""
+    ssids = dashboard.wireless.getNetworkWirelessSsids(network_id)
+    ssid_data = []
+    for ssid in ssids:
+        ssid_data.append({
+            "name": ssid.get("name", "N/A"),
+            "enabled": ssid.get("enabled", "N/A"),
+            "bandwidth_limit": ssid.get("bandwidthLimit", {}).get("limitUp", "N/A")
+        })
+    return ssid_data
+
+
+# Secciones de network_data en el orden en que se guardan en el JSON
+SECCIONES_RED = {
+    "devices_status": _recolectar_dispositivos,
+    "clients_data": _recolectar_clientes,
+    "firewall_rules": _recolectar_firewall,
+    "vlans": _recolectar_vlans,
+    "ssids": _recolectar_ssids,
+}
+
+
+def _medir(funcion, *args, **kwargs):
+    """Ejecuta ``funcion`` y devuelve una tupla (resultado, segundos transcurridos)."""
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def obtener_datos_red(api_key, org_id, network_id, output_file="network_data.json",
+                      concurrente=False, max_workers=MAX_WORKERS_POR_DEFECTO, tiempos=None,
+                      prioridad=PRIORIDAD_INTERACTIVA, usar_cache=False, modo_bulk=False):
     """
     Obtiene información detallada de una red específica y la guarda en un archivo JSON.
 
+    En modo concurrente las secciones de la red y las consultas por dispositivo se envían
+    a un pool de hilos acotado por ``max_workers``; el diccionario resultante es el mismo
+    que en el modo secuencial. Con ``usar_cache`` cada sección se sirve desde
+    ``meraki_cache.cache_redes`` mientras su TTL siga vigente. En modo bulk el estado de los
+    dispositivos sale de una sola consulta por organización en lugar de un ``getDevice`` por serial.
+
     :param api_key: Clave de API de Meraki.
     :param org_id: ID de la organización.
     :param network_id: ID de la red.
-    :param output_file: Nombre del archivo JSON donde se guardarán los datos (opcional).
+    :param output_file: Nombre del archivo JSON donde se guardarán los datos (None para no escribirlo).
+    :param concurrente: Si es True, recolecta las secciones en paralelo (opcional).
+    :param max_workers: Límite de llamadas simultáneas a la API en modo concurrente (opcional).
+    :param tiempos: Diccionario opcional que se completa con la duración en segundos de cada sección.
+    :param prioridad: Prioridad de las llamadas en el planificador de Meraki (opcional).
+    :param usar_cache: Si es True, reutiliza las secciones guardadas en la cache compartida (opcional).
+    :param modo_bulk: Si es True, usa getOrganizationDevicesStatuses para el estado de los dispositivos (opcional).
     :return: Diccionario con la información de la red.
     """
-    # Crear el objeto DashboardAPI
-    dashboard = meraki.DashboardAPI(api_key, log_path=None)
+    # Crear el objeto DashboardAPI; todas sus llamadas pasan por el planificador de la organización
+    dashboard_api = meraki.DashboardAPI(api_key, log_path=None, use_iterator_for_get_pages=True)
+    dashboard = DashboardPlanificado(dashboard_api, org_id, prioridad)
+    # Los refrescos de la cache no deben adelantarse a las preguntas en curso
+    dashboard_refresco = DashboardPlanificado(dashboard_api, org_id, PRIORIDAD_SEGUNDO_PLANO)
     network_data = {}
+    if tiempos is None:
+        tiempos = {}
+
+    def recolectar(seccion, *argumentos):
+        funcion = SECCIONES_RED[seccion]
+        if seccion == "devices_status" and modo_bulk:
+            funcion = partial(_recolectar_dispositivos_bulk, org_id=org_id, usar_cache=usar_cache)
+            argumentos = ()
+        if not usar_cache:
+            return funcion(dashboard, network_id, *argumentos)
+        return cache_redes.obtener(
+            network_id, seccion,
+            lambda: funcion(dashboard, network_id, *argumentos),
+            lambda: funcion(dashboard_refresco, network_id, *argumentos),
+        )
 
     try:
-        # Obtener estado de los dispositivos en la red
-        devices = dashboard.networks.getNetworkDevices(network_id)
-        devices_status = []
-        for device in devices:
-            status = dashboard.devices.getDevice(device['serial'])
-            devices_status.append({
-                "name": device.get("name", "N/A"),
-                "model": device.get("model", "N/A"),
-                "serial": device.get("serial", "N/A"),
-                "firmware": device.get("firmware", "N/A"),
-                "connection_status": status.get("status", "unknown"),
-                "uptime": status.get("uptime", "N/A"),
-                "ports_status": status.get("portStatus", "N/A")
-            })
-        network_data['devices_status'] = devices_status
-
-        # Listar clientes conectados a los puntos de acceso
-        clients = dashboard.networks.getNetworkClients(network_id, total_pages="all")
-        clients_data = []
-        for client in clients:
-            clients_data.append({
-                "ip": client.get("ip", "N/A"),
-                "description": client.get("description", "N/A"),
-                "ssid": client.get("ssid", "N/A"),
-                "uptime": client.get("uptime", "N/A"),
-                "usage": client.get("usage", {})
-            })
-        network_data['clients_data'] = clients_data
-
-        # Obtener reglas de firewall de un dispositivo MX
-        firewall_rules = dashboard.appliance.getNetworkApplianceFirewallL3FirewallRules(network_id)
-        network_data['firewall_rules'] = firewall_rules
-
-        # Listar VLANs configuradas en la red
-        vlans = dashboard.appliance.getNetworkApplianceVlans(network_id)
-        network_data['vlans'] = vlans
-
-        # Listar SSIDs configurados en los puntos de acceso
-        ssids = dashboard.wireless.getNetworkWirelessSsids(network_id)
-        ssid_data = []
-        for ssid in ssids:
-            ssid_data.append({
-                "name": ssid.get("name", "N/A"),
-                "enabled": ssid.get("enabled", "N/A"),
-                "bandwidth_limit": ssid.get("bandwidthLimit", {}).get("limitUp", "N/A")
-            })
-        network_data['ssids'] = ssid_data
+        if concurrente:
+            # Los dispositivos reciben la mitad del pool para sus getDevice; las demás secciones
+            # comparten el resto, de modo que nunca hay más de max_workers llamadas en vuelo.
+            workers_dispositivos = max(1, max_workers // 2)
+            workers_secciones = max(1, max_workers - workers_dispositivos)
+            with ThreadPoolExecutor(max_workers=workers_secciones) as executor:
+                futuros = {
+                    seccion: executor.submit(_medir, recolectar, seccion)
+                    for seccion in SECCIONES_RED
+                    if seccion != "devices_status"
+                }
+                dispositivos, tiempos["devices_status"] = _medir(
+                    recolectar, "devices_status", workers_dispositivos)
+                network_data["devices_status"] = dispositivos
+                for seccion in SECCIONES_RED:
+                    if seccion in futuros:
+                        network_data[seccion], tiempos[seccion] = futuros[seccion].result()
+        else:
+            for seccion in SECCIONES_RED:
+                network_data[seccion], tiempos[seccion] = _medir(recolectar, seccion)
 
         # Últimos eventos registrados en la red
         # events = dashboard.networks.getNetworkEvents(network_id, total_pages="all", productType="wireless")
         # network_data['events'] = events
 
-
+        for seccion, segundos in tiempos.items():
+            print(f"Sección {seccion}: {segundos:.2f} s")
 
         # Guardar la información en un archivo JSON
-        with open(output_file, "w") as json_file:
-            json.dump(network_data, json_file, indent=2)
-
-        print(f"\nSe ha guardado la información de la red en '{output_file}'.")
+        if output_file:
+            with open(output_file, "w") as json_file:
+                json.dump(network_data, json_file, indent=2)
+            print(f"\nSe ha guardado la información de la red en '{output_file}'.")
         return network_data
 
     except meraki.APIError as e:
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Annotated
+
 from dotenv import load_dotenv
 
 from livekit import rtc
 from livekit.agents import (
     AutoSubscribe,
     JobContext,
+    JobProcess,
     WorkerOptions,
     cli,
     llm,
@@ -16,9 +26,204 @@ from livekit.plugins import openai
 
 
 load_dotenv(dotenv_path=".env.local")
+
+# The Meraki/Splunk helpers live in the parent directory and read their settings
+# (MERAKI_KEY, SPLUNK_URL, ...) from its .env at import time
+REPO_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=REPO_DIR / ".env")
+sys.path.insert(0, str(REPO_DIR))
+
+import requests  # noqa: E402
+from context_builder import PRIORITY_INVENTORY, PRIORITY_LIVE_DATA, ContextBuilder  # noqa: E402
+from herramientas import Herramientas  # noqa: E402
+from indice_redes import ALIAS_FILE, IndiceRedes  # noqa: E402
+from meraki_scheduler import PRIORIDAD_SEGUNDO_PLANO  # noqa: E402
+from meraki_cache import TTL_POR_SECCION  # noqa: E402
+from meraki_utils import descubrir_inventario, refrescar_estados_org  # noqa: E402
+from splunk_collector import CHECKPOINT_FILE, STORE_FILE, IncrementalCollector  # noqa: E402
+from splunk_utils import SplunkError, get_default_client  # noqa: E402
+
 logger = logging.getLogger("my-worker")
 logger.setLevel(logging.INFO)
 
+MERAKI_KEY = os.getenv("MERAKI_KEY")
+REALTIME_MODEL = "gpt-4o-realtime-preview-2024-10-01"
+SPLUNK_COLLECT_INTERVAL = int(os.getenv("SPLUNK_COLLECT_INTERVAL", "60"))  # 0 disables the collector
+
+INVENTORY_FILE = str(REPO_DIR / "organizations_and_networks.json")
+SPLUNK_STORE_FILE = str(REPO_DIR / STORE_FILE)
+SPLUNK_CHECKPOINT_FILE = str(REPO_DIR / CHECKPOINT_FILE)
+# Held by the one worker process that runs Splunk collection and Meraki discovery
+WRITER_LOCK_FILE = str(REPO_DIR / "sophia_worker.lock")
+# Seconds between warm state refreshes. Must stay below the TTL of the org device status index
+# in the shared Meraki cache, otherwise tool calls find it expired and wait for the API
+WARM_REFRESH_S = int(os.getenv("SOPHIA_WARM_REFRESH_S",
+                               str(int(TTL_POR_SECCION["estados_dispositivos_org"] * 0.8))))
+INVENTORY_REFRESH_S = int(os.getenv("SOPHIA_INVENTORY_REFRESH_S", "300"))  # Seconds between inventory discoveries
+INSTRUCTIONS_TOKEN_BUDGET = int(os.getenv("REALTIME_CONTEXT_TOKEN_BUDGET", "3000"))
+
+INSTRUCTIONS = (
+    "Saluda diciendo tu nombre el cual es SOPHIA, luego presentas quien eres y di Bienvenido al Experience Operacion Center"
+    " Eres la Inteligencia artificial de la empresa TXDX SECURE"
+    "Tu funcion es atender a los clientes que hagan una llamada para monitorear sus equipos, resolver dudas, etc."
+    "TXDXSECURE es una empresa dedicada a redes y ciberseguridad "
+    "Te haran preguntas de ciberseguridad asi que preparate para eso. "
+    "Para preguntas sobre redes, dispositivos, clientes o eventos de seguridad usa las funciones disponibles, "
+    "que consultan Cisco Meraki y Cisco Splunk en tiempo real; si un dato no esta disponible dilo, no lo inventes."
+)
+
+context_builder = ContextBuilder(INSTRUCTIONS, REALTIME_MODEL, token_budget=INSTRUCTIONS_TOKEN_BUDGET)
+
+
+def try_writer_lock():
+    """
+    Takes the cross-process writer lock without blocking.
+
+    :return: The open lock file (keep it open to hold the lock), or None if another process holds it.
+    """
+    handle = open(WRITER_LOCK_FILE, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def refresh_warm_state(userdata: dict):
+    """
+    One refresh pass over the process-shared state: Splunk session, Meraki inventory (every
+    INVENTORY_REFRESH_S), each organization's bulk device status index plus its networks' device
+    lists, and the Splunk summary.
+
+    Only the process holding the writer lock collects Splunk events and rewrites the inventory;
+    the others reload those files when they change. Clients, firewall rules, VLANs and SSIDs are
+    still fetched on demand by the tools. Meraki calls run at background priority, so live tool
+    calls go first.
+    """
+    tools = userdata["tools"]
+    collector = userdata["collector"]
+    if userdata["writer_lock"] is None:
+        # The previous writer may have exited and released the lock
+        userdata["writer_lock"] = try_writer_lock()
+        if userdata["writer_lock"] is not None:
+            logger.info("this process now collects Splunk events and discovers the Meraki inventory")
+            if SPLUNK_COLLECT_INTERVAL > 0:
+                collector.start_background(SPLUNK_COLLECT_INTERVAL)
+    try:
+        get_default_client().get_session_key()
+    except (SplunkError, requests.RequestException) as e:
+        logger.warning(f"splunk login failed: {e}")
+    if userdata["writer_lock"] is None:
+        collector.reload()
+    elif time.monotonic() - userdata["inventory_refreshed"] >= INVENTORY_REFRESH_S:
+        # Rewrites the inventory file only when it changed; every process's index reloads on the new mtime
+        descubrir_inventario(MERAKI_KEY, INVENTORY_FILE)
+        userdata["inventory_refreshed"] = time.monotonic()
+    for organization in tools.indice_redes.organizaciones():
+        refrescar_estados_org(MERAKI_KEY, organization["org_id"],
+                              [network["network_id"] for network in organization.get("networks", [])],
+                              prioridad=PRIORIDAD_SEGUNDO_PLANO)
+    userdata["splunk_summary"] = collector.store.summary(top=5)
+
+
+def prewarm(proc: JobProcess):
+    """
+    Loads the Meraki/Splunk backend once per worker process, before it is assigned a room.
+
+    Only local data is read here (inventory file, Splunk event store) so the process starts
+    quickly; the network calls run on a refresher thread that keeps the state fresh for as
+    long as the process lives. Every room served by the process reuses the same state.
+    """
+    networks = IndiceRedes(INVENTORY_FILE, alias_file=str(REPO_DIR / ALIAS_FILE))
+    collector = IncrementalCollector(store_file=SPLUNK_STORE_FILE, checkpoint_file=SPLUNK_CHECKPOINT_FILE)
+    proc.userdata["writer_lock"] = None  # Taken by the first refresh
+    proc.userdata["inventory_refreshed"] = float("-inf")
+    proc.userdata["collector"] = collector
+    proc.userdata["tools"] = Herramientas(MERAKI_KEY, REALTIME_MODEL, lambda: collector.store, networks)
+    proc.userdata["splunk_summary"] = collector.store.summary(top=5)
+
+    def refresh_loop():
+        while True:
+            started = time.monotonic()
+            try:
+                refresh_warm_state(proc.userdata)
+            except Exception:
+                logger.exception("warm state refresh failed")
+            logger.info(f"warm state refreshed in {time.monotonic() - started:.1f}s")
+            time.sleep(WARM_REFRESH_S)
+
+    threading.Thread(target=refresh_loop, name="warm-state", daemon=True).start()
+
+
+def build_instructions(userdata: dict) -> str:
+    """Persona plus the pre-fetched inventory and Splunk summary, so common questions need no tool call"""
+    return context_builder.build([
+        (PRIORITY_INVENTORY, "Organizaciones y redes disponibles", userdata["tools"].indice_redes.organizaciones()),
+        (PRIORITY_LIVE_DATA, "Resumen de eventos de seguridad de Splunk", userdata["splunk_summary"]),
+    ])
+
+
+class SophiaFunctions(llm.FunctionContext):
+    """
+    Meraki and Splunk lookups exposed to the realtime model as function tools.
+
+    The lookups are blocking (HTTP calls, file reads), so they run in worker threads and
+    the audio event loop keeps streaming while they complete.
+    """
+
+    def __init__(self, tools: Herramientas):
+        super().__init__()
+        self._tools = tools
+
+    async def _run(self, name: str, **arguments) -> str:
+        arguments = {key: value for key, value in arguments.items() if value}
+        logger.info(f"tool call {name}({arguments})")
+        return await asyncio.to_thread(self._tools.ejecutar, name, json.dumps(arguments))
+
+    @llm.ai_callable(description="Lista las organizaciones y redes de Cisco Meraki disponibles.")
+    async def listar_redes(self) -> str:
+        organizations = await asyncio.to_thread(self._tools.indice_redes.organizaciones)
+        return json.dumps(
+            {org.get("name", org["org_id"]): [network["name"] for network in org.get("networks", [])]
+             for org in organizations},
+            ensure_ascii=False,
+        )
+
+    @llm.ai_callable(description="Datos en tiempo real de una red de Cisco Meraki: estado de dispositivos, "
+                                 "clientes conectados, reglas de firewall, VLANs y SSIDs.")
+    async def consultar_red_meraki(
+        self,
+        nombre_red: Annotated[str, llm.TypeInfo(description="Nombre de la red, por ejemplo 'Office Lima'.")],
+        seccion: Annotated[str, llm.TypeInfo(
+            description="Sección a consultar: devices_status, clients_data, firewall_rules, vlans o ssids. "
+                        "Vacío para todas.")] = "",
+    ) -> str:
+        return await self._run("consultar_red_meraki", nombre_red=nombre_red, secciones=[seccion] if seccion else None)
+
+    @llm.ai_callable(description="Estado (online, offline, alerting) de los dispositivos de una red de Cisco Meraki.")
+    async def estado_dispositivos(
+        self,
+        nombre_red: Annotated[str, llm.TypeInfo(description="Nombre de la red, por ejemplo 'Office Lima'.")],
+    ) -> str:
+        return await self._run("consultar_red_meraki", nombre_red=nombre_red, secciones=["devices_status"])
+
+    @llm.ai_callable(description="Eventos de seguridad de Cisco Splunk. Sin argumentos devuelve un resumen "
+                                 "(IPs con intentos de fuerza bruta, conteos por host y sourcetype).")
+    async def consultar_eventos_splunk(
+        self,
+        ip: Annotated[str, llm.TypeInfo(description="IP de origen a buscar.")] = "",
+        usuario: Annotated[str, llm.TypeInfo(description="Usuario a buscar.")] = "",
+        busqueda: Annotated[str, llm.TypeInfo(
+            description="Consulta SPL que empiece con 'search'; solo comandos de filtrado y estadísticas.")] = "",
+    ) -> str:
+        return await self._run("consultar_eventos_splunk", ip=ip, usuario=usuario, busqueda=busqueda)
+
 
 async def entrypoint(ctx: JobContext):
     logger.info(f"connecting to room {ctx.room.name}")
@@ -26,27 +231,23 @@ async def entrypoint(ctx: JobContext):
 
     participant = await ctx.wait_for_participant()
 
-    run_multimodal_agent(ctx, participant)
+    # State loaded by prewarm and kept fresh in the background; no per-call discovery or login
+    instructions = await asyncio.to_thread(build_instructions, ctx.proc.userdata)
+    run_multimodal_agent(ctx, participant, ctx.proc.userdata["tools"], instructions)
 
     logger.info("agent started")
 
 
-def run_multimodal_agent(ctx: JobContext, participant: rtc.Participant):
+def run_multimodal_agent(ctx: JobContext, participant: rtc.Participant, tools: Herramientas, instructions: str):
     logger.info("starting multimodal agent")
 
     model = openai.realtime.RealtimeModel(
-        instructions=(
-            "Saluda diciendo tu nombre el cual es SOPHIA, luego presentas quien eres y di Bienvenido al Experience Operacion Center"
-            " Eres la Inteligencia artificial de la empresa TXDX SECURE"
-            "Tu funcion es atender a los clientes que hagan una llamada para monitorear sus equipos, resolver dudas, etc."
-            "TXDXSECURE es una empresa dedicada a redes y ciberseguridad "
-            "Te haran preguntas de ciberseguridad asi que preparate para eso, si hay algun dato sobre la empresa que no sepas, inventalo"
-        ),
+        instructions=instructions,
         modalities=["audio", "text"],
-        model=("gpt-4o-realtime-preview-2024-10-01"),
+        model=REALTIME_MODEL,
         voice="sage"
     )
-    assistant = MultimodalAgent(model=model)
+    assistant = MultimodalAgent(model=model, fnc_ctx=SophiaFunctions(tools))
     assistant.start(ctx.room, participant)
 
     session = model.sessions[0]
@@ -63,6 +264,7 @@ if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
         )
     )
 
@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+from splunk_store import EventStore
+from splunk_utils import SplunkError, filter_result, get_default_client
+
+# Archivos del recolector
+CHECKPOINT_FILE = os.getenv("SPLUNK_CHECKPOINT_FILE", "splunk_checkpoint.json")
+STORE_FILE = os.getenv("SPLUNK_STORE_FILE", "splunk_store.ndjson")
+
+# Búsqueda base sobre la que se agrega la ventana incremental
+DEFAULT_SEARCH = "search index=main"
+
+# Ventana de la primera ejecución, cuando todavía no hay checkpoint
+INITIAL_WINDOW = "-24h"
+
+# Retraso máximo esperado entre _time e _indextime; acota por _time el escaneo de cada consulta
+INDEX_LAG_S = int(os.getenv("SPLUNK_INDEX_LAG_S", "3600"))
+
+# Política de expulsión del almacén local
+MAX_AGE_S = 7 * 24 * 3600  # Eventos indexados hace más de 7 días
+MAX_EVENTS = 50000
+
+
+def _event_id(result):
+    """Identificador estable de un evento dentro de Splunk (bucket + dirección del evento)"""
+    return f"{result.get('_bkt')}:{result.get('_cd')}"
+
+
+class IncrementalCollector:
+    """
+    Recolector incremental de eventos de Splunk con checkpoint por _indextime.
+
+    Cada ejecución consulta solo los eventos indexados desde el último checkpoint
+    (``_index_earliest``), los agrega a un almacén local NDJSON y expulsa los eventos más
+    antiguos que ``max_age_s`` o que excedan ``max_events``. ``store`` mantiene los mismos
+    eventos en un EventStore en memoria con sus agregados al día.
+    """
+
+    def __init__(self, base_search=DEFAULT_SEARCH, store_file=STORE_FILE, checkpoint_file=CHECKPOINT_FILE,
+                 max_age_s=MAX_AGE_S, max_events=MAX_EVENTS, client=None):
+        """
+        :param base_search: Consulta SPL base (sin ventana de tiempo).
+        :param store_file: Archivo NDJSON donde se guardan los eventos.
+        :param checkpoint_file: Archivo JSON con el último _indextime visto.
+        :param max_age_s: Edad máxima de un evento en el almacén, en segundos.
+        :param max_events: Número máximo de eventos en el almacén.
+        :param client: SplunkClient a usar (por defecto el cliente compartido).
+        """
+        self.base_search = base_search
+        self.store_file = store_file
+        self.checkpoint_file = checkpoint_file
+        self.max_age_s = max_age_s
+        self.max_events = max_events
+        self.client = client or get_default_client()
+        self._lock = threading.Lock()
+        self._store_mtime = self._file_mtime()
+        self.store = EventStore.from_events(self.iter_events())
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.store_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def load_checkpoint(self):
+        """Devuelve {"indextime": int, "seen": [ids]} o None si todavía no hay checkpoint"""
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_checkpoint(self, checkpoint):
+        """Guarda el checkpoint de forma atómica"""
+        temp = f"{self.checkpoint_file}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp, self.checkpoint_file)
+
+    def build_query(self, checkpoint):
+        """Agrega la ventana incremental a la búsqueda base"""
+        if checkpoint is None:
+            return self.base_search, INITIAL_WINDOW
+        # _index_earliest es inclusivo: los eventos ya vistos de ese segundo se descartan con "seen".
+        # Splunk poda los buckets por _time, así que earliest_time acota el escaneo a INDEX_LAG_S
+        # antes del checkpoint (eventos que llegan con más retraso que eso no se recolectan)
+        earliest_time = str(max(0, checkpoint["indextime"] - INDEX_LAG_S))
+        return f"{self.base_search} _index_earliest={checkpoint['indextime']}", earliest_time
+
+    def collect(self):
+        """
+        Consulta los eventos nuevos, los agrega al almacén y actualiza el checkpoint
+
+        :return: Número de eventos nuevos agregados.
+        """
+        with self._lock:
+            checkpoint = self.load_checkpoint()
+            query, earliest_time = self.build_query(checkpoint)
+            # El export llega del más nuevo al más viejo: cada evento se compara contra el checkpoint
+            # guardado, y el nuevo máximo se acumula aparte
+            checkpoint_indextime = checkpoint["indextime"] if checkpoint else 0
+            checkpoint_seen = set(checkpoint["seen"]) if checkpoint else set()
+            last_indextime = checkpoint_indextime
+            seen = set(checkpoint_seen)
+
+            # El lote se escribe aparte y solo pasa al almacén cuando el export terminó sin errores:
+            # si falla a mitad de camino, la próxima ejecución lo pide completo sin duplicar eventos
+            batch_file = f"{self.store_file}.batch"
+            added = 0
+            try:
+                with open(batch_file, "w", encoding="utf-8") as batch:
+                    for result in self.client.export_search(query, earliest_time=earliest_time):
+                        indextime = int(result.get("_indextime", 0))
+                        event_id = _event_id(result)
+                        if indextime < checkpoint_indextime or (
+                                indextime == checkpoint_indextime and event_id in checkpoint_seen):
+                            continue
+                        if indextime > last_indextime:
+                            last_indextime = indextime
+                            seen = set()
+                        if indextime == last_indextime:
+                            seen.add(event_id)
+                        event = filter_result(result)
+                        event["indextime"] = indextime
+                        batch.write(json.dumps(event, ensure_ascii=False))
+                        batch.write("\n")
+                        added += 1
+
+                if added:
+                    with open(batch_file, "r", encoding="utf-8") as batch, \
+                            open(self.store_file, "a", encoding="utf-8") as f:
+                        for line in batch:
+                            f.write(line)
+                            self.store.add(json.loads(line))
+                    self.save_checkpoint({"indextime": last_indextime, "seen": sorted(seen)})
+            finally:
+                if os.path.exists(batch_file):
+                    os.remove(batch_file)
+            self.evict()
+            print(f"Recolector de Splunk: {added} eventos nuevos (checkpoint _indextime={last_indextime}).")
+            return added
+
+    def evict(self):
+        """Reescribe el almacén sin los eventos vencidos y conservando como máximo max_events"""
+        if not os.path.exists(self.store_file):
+            return
+        oldest = time.time() - self.max_age_s
+        kept = deque(maxlen=self.max_events)
+        total = 0
+        for event in self.iter_events():
+            total += 1
+            if event.get("indextime", 0) >= oldest:
+                kept.append(event)
+        if len(kept) == total:
+            return
+        self.store = EventStore.from_events(kept)
+        temp = f"{self.store_file}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            for event in kept:
+                f.write(json.dumps(event, ensure_ascii=False))
+                f.write("\n")
+        os.replace(temp, self.store_file)
+        print(f"Recolector de Splunk: se expulsaron {total - len(kept)} eventos del almacén.")
+
+    def reload(self):
+        """
+        Vuelve a leer el almacén si el archivo cambió; lo usan los procesos que solo leen los
+        eventos mientras otro proceso ejecuta collect
+
+        :return: True si se recargó el almacén.
+        """
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._store_mtime:
+            return False
+        with self._lock:
+            try:
+                store = EventStore.from_events(self.iter_events())
+            except ValueError:
+                # Línea a medio escribir por el otro proceso: se reintenta en la próxima recarga
+                return False
+            self.store = store
+            self._store_mtime = mtime
+        return True
+
+    def iter_events(self):
+        """Genera los eventos del almacén local, del más antiguo al más reciente"""
+        try:
+            with open(self.store_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def load_events(self, limit=None):
+        """Devuelve los eventos del almacén; con limit, solo los más recientes"""
+        if limit is None:
+            return list(self.iter_events())
+        return list(deque(self.iter_events(), maxlen=limit))
+
+    def start_background(self, interval_s):
+        """
+        Ejecuta collect cada interval_s segundos en un hilo daemon
+
+        :return: El hilo iniciado.
+        """
+        def loop():
+            while True:
+                try:
+                    self.collect()
+                except (SplunkError, requests.RequestException, OSError) as e:
+                    print(f"Error en el recolector de Splunk: {e}")
+                time.sleep(interval_s)
+
+        thread = threading.Thread(target=loop, name="recolector-splunk", daemon=True)
+        thread.start()
+        return thread
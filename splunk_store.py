@@ -0,0 +1,197 @@
+import heapq
+import re
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from splunk_utils import index_record, parse_raw
+
+# Ancho de cada barra del histograma de tiempo, en segundos
+HISTOGRAM_BUCKET_S = 3600
+
+# IP de origen en líneas que parse_raw no reconoce, como "src=10.0.0.5"
+_SRC_IP_RE = re.compile(r"\b(?:from|src=|src_ip=|SRC=)\s*(\d{1,3}(?:\.\d{1,3}){3})\b")
+
+
+def _parse_time(value):
+    """Convierte _time de Splunk (ISO 8601 o epoch) a segundos epoch; 0.0 si no se puede leer"""
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _first(event, *keys):
+    """Devuelve el primer campo presente; acepta tanto resultados crudos como registros filtrados"""
+    for key in keys:
+        if key in event:
+            return event[key]
+    return None
+
+
+class EventStore:
+    """
+    Almacén columnar en memoria de eventos de Splunk.
+
+    Los campos de baja cardinalidad (host, source, sourcetype) se guardan internados como índices
+    de una tabla de cadenas, y los tiempos en arreglos numéricos empaquetados. Los agregados
+    (conteos por host y sourcetype, histograma de tiempo e IPs de origen) se actualizan en cada
+    ``add``, por lo que consultarlos no recorre los eventos. Cada ``_raw`` pasa por
+    ``splunk_utils.parse_raw`` y sus campos alimentan índices invertidos por src_ip y user.
+    """
+
+    def __init__(self, histogram_bucket_s=HISTOGRAM_BUCKET_S):
+        self.histogram_bucket_s = histogram_bucket_s
+        self._lock = threading.Lock()
+        self._string_ids = {}
+        self._strings = []
+        self._time = array("d")
+        self._indextime = array("q")
+        self._host = array("I")
+        self._source = array("I")
+        self._sourcetype = array("I")
+        self._raw = []
+        self.host_counts = Counter()
+        self.sourcetype_counts = Counter()
+        self.time_histogram = Counter()
+        self.src_ip_counts = Counter()
+        self.failures_by_src_ip = Counter()
+        self.failed_users_by_src_ip = {}
+        self.indexes = {}  # {campo: {valor: [posiciones]}}
+        self._user = array("I")
+        self._outcome = array("I")
+        self.min_time = None
+        self.max_time = None
+
+    def _intern(self, value):
+        value = "" if value is None else str(value)
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._string_ids[value] = string_id
+            self._strings.append(value)
+        return string_id
+
+    def add(self, event):
+        """Agrega un evento (resultado crudo de Splunk o registro de filter_result) y actualiza los agregados"""
+        timestamp = _parse_time(_first(event, "_time", "time"))
+        indextime = int(_first(event, "_indextime", "indextime") or 0)
+        host = _first(event, "host")
+        sourcetype = _first(event, "sourcetype")
+        raw = _first(event, "_raw", "raw") or ""
+        parsed = parse_raw(raw)
+        if parsed["src_ip"] is None:
+            match = _SRC_IP_RE.search(raw)
+            if match:
+                parsed["src_ip"] = match.group(1)
+        with self._lock:
+            position = len(self._raw)
+            self._time.append(timestamp)
+            self._indextime.append(indextime)
+            self._host.append(self._intern(host))
+            self._source.append(self._intern(_first(event, "source")))
+            self._sourcetype.append(self._intern(sourcetype))
+            self._raw.append(raw)
+            self.min_time = timestamp if self.min_time is None else min(self.min_time, timestamp)
+            self.max_time = timestamp if self.max_time is None else max(self.max_time, timestamp)
+            self.host_counts[host] += 1
+            self.sourcetype_counts[sourcetype] += 1
+            self.time_histogram[int(timestamp // self.histogram_bucket_s) * self.histogram_bucket_s] += 1
+            self._user.append(self._intern(parsed["user"]))
+            self._outcome.append(self._intern(parsed["outcome"]))
+            index_record(self.indexes, position, parsed)
+            src_ip = parsed["src_ip"]
+            if src_ip is not None:
+                self.src_ip_counts[src_ip] += 1
+                if parsed["outcome"] in ("failure", "invalid_user"):
+                    self.failures_by_src_ip[src_ip] += 1
+                    if parsed["user"] is not None:
+                        self.failed_users_by_src_ip.setdefault(src_ip, set()).add(parsed["user"])
+
+    def extend(self, events):
+        for event in events:
+            self.add(event)
+
+    @classmethod
+    def from_events(cls, events, **kwargs):
+        store = cls(**kwargs)
+        store.extend(events)
+        return store
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __getitem__(self, i):
+        """Reconstruye el evento i con el mismo formato que filter_result"""
+        with self._lock:
+            return {
+                "time": datetime.fromtimestamp(self._time[i]).astimezone().isoformat(),
+                "host": self._strings[self._host[i]],
+                "source": self._strings[self._source[i]],
+                "sourcetype": self._strings[self._sourcetype[i]],
+                "raw": self._raw[i],
+                "indextime": self._indextime[i],
+                "user": self._strings[self._user[i]] or None,
+                "outcome": self._strings[self._outcome[i]] or None,
+            }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def latest(self, n):
+        """
+        Devuelve los n eventos más recientes por _time (y _indextime en caso de empate), del más
+        nuevo al más viejo. No depende del orden de inserción: el export de Splunk entrega cada
+        lote del más nuevo al más viejo.
+        """
+        with self._lock:
+            positions = heapq.nlargest(n, range(len(self._raw)),
+                                       key=lambda i: (self._time[i], self._indextime[i], i))
+        return [self[i] for i in positions]
+
+    def lookup(self, field, value):
+        """Devuelve los eventos con ese valor de src_ip o user usando el índice invertido"""
+        positions = self.indexes.get(field, {}).get(value, [])
+        return [self[i] for i in positions]
+
+    def brute_force_sources(self, min_failures=3):
+        """IPs con al menos min_failures intentos de acceso fallidos y los usuarios que probaron"""
+        with self._lock:
+            return [
+                {"src_ip": src_ip, "failures": failures,
+                 "users": sorted(self.failed_users_by_src_ip.get(src_ip, ()))}
+                for src_ip, failures in self.failures_by_src_ip.most_common()
+                if failures >= min_failures
+            ]
+
+    def top_src_ips(self, n=10):
+        with self._lock:
+            return self.src_ip_counts.most_common(n)
+
+    def summary(self, top=10):
+        """Resumen compacto de los agregados, pensado para incluirse en el contexto del asistente"""
+        brute_force = self.brute_force_sources()[:top]
+        with self._lock:
+            return {
+                "brute_force_sources": brute_force,
+                "total_events": len(self._raw),
+                "time_range": [
+                    datetime.fromtimestamp(self.min_time).astimezone().isoformat(),
+                    datetime.fromtimestamp(self.max_time).astimezone().isoformat(),
+                ] if self._raw else None,
+                "events_by_host": dict(self.host_counts.most_common(top)),
+                "events_by_sourcetype": dict(self.sourcetype_counts.most_common(top)),
+                "top_src_ips": dict(self.src_ip_counts.most_common(top)),
+                "time_histogram": {
+                    datetime.fromtimestamp(bucket).astimezone().isoformat(): count
+                    for bucket, count in sorted(self.time_histogram.items())
+                },
+            }
@@ -1,10 +1,14 @@
 import requests
 import json
+import threading
 import time
 import urllib3
 import os
+import re
 import xml.etree.ElementTree as ET
-from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Deshabilitar advertencias de HTTPS no verificadas (solo para desarrollo)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -14,113 +18,557 @@ splunk_url = os.getenv("SPLUNK_URL", "https://192.168.1.148:8089")  # URL del se
 username = os.getenv("SPLUNK_USERNAME", "admin")  # Nombre de usuario
 password = os.getenv("SPLUNK_PASSWORD", "qx4JYz855.2aPDdH3Hj.58xBK4ce23gb")  # Contraseña
 
-# Función para obtener el Session Key con reintentos
-def get_session_key():
-    """Autentica en Splunk y obtiene un Session Key, con reintentos en caso de fallo"""
-    url = f"{splunk_url}/services/auth/login"
-    data = {"username": username, "password": password}
-    for attempt in range(3):  # Reintentar hasta 3 veces
-        response = requests.post(url, data=data, verify=False)
-        if response.status_code == 200:  # Comprobar si la respuesta es exitosa
-            session_key = response.text.split("<sessionKey>")[1].split("</sessionKey>")[0]
-            print("Autenticación exitosa.")
-            return session_key
-        else:
+# Segundos máximos de espera de un Job antes de lanzar SplunkTimeoutError
+JOB_TIMEOUT = float(os.getenv("SPLUNK_JOB_TIMEOUT", "200"))
+
+# Búsquedas del informe de seguridad, ejecutadas en paralelo por security_briefing
+SECURITY_BRIEFING_QUERIES = {
+    "failed_ssh_logins": "search index=main sourcetype=secure.log \"Failed password\" | head 100",
+    "pan_config_changes": "search index=main sourcetype=pan:config | head 50",
+    "top_talkers": "search index=main | rex \"from (?<src_ip>\\d+\\.\\d+\\.\\d+\\.\\d+)\" "
+                   "| top limit=10 src_ip",
+}
+
+# Resultados por página al leer /results (Splunk devuelve 100 por defecto)
+RESULTS_PAGE_SIZE = 10000
+
+
+class SplunkError(Exception):
+    """Error al comunicarse con la API REST de Splunk."""
+
+
+class SplunkTimeoutError(SplunkError):
+    """El Job de búsqueda no terminó dentro del tiempo máximo de espera."""
+
+
+class SplunkClient:
+    """
+    Cliente de la API REST de Splunk con una sesión HTTP persistente.
+
+    Reutiliza las conexiones TLS (keep-alive) mediante un pool, guarda el Session Key y vuelve a
+    autenticarse automáticamente solo cuando una llamada recibe un 401.
+    """
+
+    def __init__(self, url=None, user=None, pwd=None, pool_size=10, retries=3, timeout=30, verify=False):
+        """
+        :param url: URL del servidor Splunk (por defecto SPLUNK_URL).
+        :param user: Nombre de usuario (por defecto SPLUNK_USERNAME).
+        :param pwd: Contraseña (por defecto SPLUNK_PASSWORD).
+        :param pool_size: Conexiones mantenidas abiertas en el pool (opcional).
+        :param retries: Reintentos ante errores de conexión y respuestas 502/503/504 (opcional).
+        :param timeout: Tiempo máximo en segundos de cada petición (opcional).
+        :param verify: Verificar el certificado TLS del servidor (opcional).
+        """
+        self.url = (url or splunk_url).rstrip("/")
+        self.username = user or username
+        self.password = pwd or password
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.verify = verify
+        # Los reintentos por código de estado solo se aplican a GET para no duplicar Jobs; al agotarlos
+        # se devuelve la última respuesta y cada método la informa como SplunkError
+        retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({"GET"}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._session_key = None
+        self._lock = threading.Lock()
+
+    def _send(self, method, path, timeout, **kwargs):
+        """Envía una petición con la sesión; los errores de conexión y de tiempo se lanzan como SplunkError"""
+        try:
+            return self.session.request(method, f"{self.url}{path}", timeout=timeout, **kwargs)
+        except requests.Timeout as e:
+            raise SplunkTimeoutError(f"Splunk no respondió en {timeout} s ({method} {path}).") from e
+        except requests.RequestException as e:
+            raise SplunkError(f"No se pudo conectar con Splunk ({method} {path}): {e}") from e
+
+    def login(self):
+        """Autentica en Splunk y obtiene un Session Key, con reintentos en caso de fallo"""
+        data = {"username": self.username, "password": self.password}
+        for attempt in range(3):  # Reintentar hasta 3 veces
+            response = self._send("POST", "/services/auth/login", self.timeout, data=data)
+            if response.status_code == 200:  # Comprobar si la respuesta es exitosa
+                self._session_key = response.text.split("<sessionKey>")[1].split("</sessionKey>")[0]
+                print("Autenticación exitosa.")
+                return self._session_key
             print(f"Intento {attempt + 1}: Error en la autenticación. Reintentando...")
             time.sleep(2)  # Esperar 2 segundos entre intentos
-    print("Error: No se pudo autenticar después de 3 intentos.")
-    exit()
+        raise SplunkError("No se pudo autenticar después de 3 intentos.")
 
-# Función para crear un Job de búsqueda
-def create_search_job(session_key, search_query):
-    """Crea un Job de búsqueda en Splunk y devuelve el SID"""
-    if not search_query.strip():
-        print("Error: La consulta de búsqueda no puede estar vacía.")
-        exit()
-    url = f"{splunk_url}/services/search/jobs"
-    headers = {"Authorization": f"Splunk {session_key}"}  # Agregar Session Key al encabezado
-    data = {
-        "search": search_query,  # Consulta de búsqueda
-        "output_mode": "json"  # Solicitar salida en formato JSON
-    }
-    response = requests.post(url, headers=headers, data=data, verify=False)  # Enviar solicitud POST
+    def get_session_key(self):
+        """Devuelve el Session Key guardado, autenticando solo si aún no existe"""
+        with self._lock:
+            if self._session_key is None:
+                self.login()
+            return self._session_key
 
-    if response.status_code == 201:  # Comprobar si el Job fue creado
-        sid = response.json().get("sid")  # Extraer el SID
-        print("Job de búsqueda creado con SID:", sid)
-        return sid
-    else:
-        print("Error al crear el Job de búsqueda:", response.text)
-        exit()
+    def set_session_key(self, session_key):
+        """Usa un Session Key obtenido por otro medio en lugar de autenticar"""
+        with self._lock:
+            self._session_key = session_key
 
-# Función para verificar el estado del Job con barra de progreso
-def check_job_status(session_key, sid):
-    """Verifica si el Job de búsqueda está completo con una barra de progreso"""
-    url = f"{splunk_url}/services/search/jobs/{sid}"
-    headers = {"Authorization": f"Splunk {session_key}"}
-    params = {"output_mode": "json"}  # Forzar salida en JSON
+    def _request(self, method, path, **kwargs):
+        """
+        Envía una petición autenticada; ante un 401 renueva el Session Key y reintenta una vez.
+        Acepta timeout para reemplazar el de la sesión en esta petición.
+        """
+        timeout = kwargs.pop("timeout", self.timeout)
+        session_key = self.get_session_key()
+        for _ in range(2):
+            headers = {"Authorization": f"Splunk {session_key}"}  # Agregar Session Key al encabezado
+            response = self._send(method, path, timeout, headers=headers, **kwargs)
+            if response.status_code != 401:
+                return response
+            # Liberar la conexión del pool antes de reintentar
+            response.close()
+            with self._lock:
+                # Si otro hilo ya renovó la sesión, usar la nueva en lugar de autenticar otra vez
+                if self._session_key == session_key:
+                    print("Session Key expirado. Autenticando de nuevo...")
+                    self.login()
+                session_key = self._session_key
+        return response
 
-    for _ in tqdm(range(100), desc="Procesando Job", unit="step"):
-        response = requests.get(url, headers=headers, params=params, verify=False)
+    def create_search_job(self, search_query, exec_mode="normal", timeout=JOB_TIMEOUT):
+        """
+        Crea un Job de búsqueda en Splunk y devuelve el SID
+
+        Con exec_mode="blocking" Splunk responde solo cuando el Job terminó, sin necesidad de sondeo;
+        la petición espera hasta timeout segundos y luego lanza SplunkTimeoutError.
+        """
+        if not search_query.strip():
+            raise SplunkError("La consulta de búsqueda no puede estar vacía.")
+        data = {
+            "search": search_query,  # Consulta de búsqueda
+            "exec_mode": exec_mode,  # normal o blocking
+            "output_mode": "json"  # Solicitar salida en formato JSON
+        }
+        request_timeout = timeout if exec_mode == "blocking" else self.timeout
+        response = self._request("POST", "/services/search/jobs", data=data,
+                                 timeout=request_timeout)  # Enviar solicitud POST
+
+        if response.status_code == 201:  # Comprobar si el Job fue creado
+            sid = response.json().get("sid")  # Extraer el SID
+            print("Job de búsqueda creado con SID:", sid)
+            return sid
+        raise SplunkError(f"Error al crear el Job de búsqueda: {response.text}")
+
+    def oneshot_search(self, search_query, count=0):
+        """
+        Ejecuta una búsqueda corta con exec_mode=oneshot y devuelve los resultados en la misma respuesta
+
+        :param search_query: Consulta SPL.
+        :param count: Máximo de resultados (0 = sin límite).
+        :return: Lista de resultados sin filtrar.
+        """
+        if not search_query.strip():
+            raise SplunkError("La consulta de búsqueda no puede estar vacía.")
+        data = {
+            "search": search_query,
+            "exec_mode": "oneshot",
+            "count": count,
+            "output_mode": "json"
+        }
+        response = self._request("POST", "/services/search/jobs", data=data)
         if response.status_code == 200:
+            results = response.json().get("results", [])
+            print(f"Se recuperaron {len(results)} resultados.")
+            return results
+        raise SplunkError(f"Error en la búsqueda oneshot: {response.text}")
+
+    def get_dispatch_state(self, sid):
+        """Devuelve el dispatchState actual del Job (QUEUED, PARSING, RUNNING, DONE, FAILED...)"""
+        params = {"output_mode": "json"}  # Forzar salida en JSON
+        response = self._request("GET", f"/services/search/jobs/{sid}", params=params)
+        if response.status_code != 200:
+            return None
+        try:
+            content = response.json()
+            return content.get("entry", [])[0].get("content", {}).get("dispatchState")
+        except json.JSONDecodeError:
+            print("La respuesta no está en formato JSON. Intentando parsear XML...")
+            root = ET.fromstring(response.text)
+            for elem in root.iter("{http://dev.splunk.com/ns/rest}key"):
+                if elem.attrib.get("name") == "dispatchState":
+                    return elem.text
+        return None
+
+    def wait_for_job(self, sid, timeout=JOB_TIMEOUT, initial_interval=0.05, max_interval=2.0, backoff=2.0):
+        """
+        Espera a que el Job termine sondeando su estado con backoff exponencial
+
+        :param sid: SID del Job.
+        :param timeout: Segundos máximos de espera antes de lanzar SplunkTimeoutError.
+        :param initial_interval: Primera pausa entre consultas de estado, en segundos.
+        :param max_interval: Pausa máxima entre consultas de estado, en segundos.
+        :param backoff: Factor por el que crece la pausa después de cada consulta.
+        :return: Diccionario con el número de consultas de estado (polls) y los segundos de espera (wait_s).
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        interval = initial_interval
+        polls = 0
+        while True:
+            dispatch_state = self.get_dispatch_state(sid)
+            polls += 1
+            if dispatch_state == "DONE":
+                return {"polls": polls, "wait_s": time.perf_counter() - start}
+            if dispatch_state == "FAILED":
+                raise SplunkError(f"El Job {sid} terminó con estado FAILED.")
+            if dispatch_state is None:
+                # El Job ya no existe (404) o su estado no se pudo leer: seguir sondeando no sirve
+                raise SplunkError(f"No se pudo obtener el estado del Job {sid}.")
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise SplunkTimeoutError(f"El Job {sid} no se completó en {timeout} s "
+                                         f"(último estado: {dispatch_state}, {polls} consultas).")
+            time.sleep(min(interval, remaining))
+            interval = min(interval * backoff, max_interval)
+
+    def check_job_status(self, sid, timeout=JOB_TIMEOUT):
+        """Verifica si el Job de búsqueda está completo; lanza SplunkTimeoutError si no termina a tiempo"""
+        self.wait_for_job(sid, timeout=timeout)
+        print("Job completado.")
+        return True
+
+    def run_search(self, search_query, exec_mode="normal", timeout=JOB_TIMEOUT, stats=None):
+        """
+        Ejecuta una búsqueda completa y devuelve sus resultados sin filtrar
+
+        - "oneshot": una sola petición que ya trae los resultados; ideal para búsquedas cortas.
+        - "blocking": Splunk responde al terminar el Job; no hay sondeo.
+        - "normal": el Job se sondea con backoff exponencial desde 50 ms.
+
+        :param search_query: Consulta SPL.
+        :param exec_mode: "oneshot", "blocking" o "normal".
+        :param timeout: Segundos máximos de espera del Job en modos normal y blocking.
+        :param stats: Diccionario opcional que se completa con dispatch_s, polls y total_s.
+        :return: Lista de resultados.
+        """
+        if stats is None:
+            stats = {}
+        start = time.perf_counter()
+        if exec_mode == "oneshot":
+            results = self.oneshot_search(search_query)
+            stats.update(dispatch_s=time.perf_counter() - start, polls=0)
+        else:
+            sid = self.create_search_job(search_query, exec_mode=exec_mode, timeout=timeout)
+            stats["dispatch_s"] = time.perf_counter() - start
+            stats["polls"] = 0
+            if exec_mode != "blocking":
+                stats["polls"] = self.wait_for_job(sid, timeout=timeout)["polls"]
+            results = self.get_search_results(sid)
+        stats["total_s"] = time.perf_counter() - start
+        print(f"Búsqueda completada: despacho {stats['dispatch_s']:.2f} s, "
+              f"{stats['polls']} consultas de estado, total {stats['total_s']:.2f} s")
+        return results
+
+    def run_searches(self, queries, exec_mode="normal", timeout=JOB_TIMEOUT, max_workers=None):
+        """
+        Lanza varias búsquedas a la vez y genera sus resultados a medida que cada Job termina
+
+        Todas las búsquedas se despachan al mismo tiempo y se esperan en paralelo, por lo que el
+        lote tarda lo que la búsqueda más lenta y no la suma de todas.
+
+        :param queries: Diccionario {nombre: consulta SPL} o lista de consultas.
+        :param exec_mode: Modo de ejecución de cada búsqueda (ver run_search).
+        :param timeout: Segundos máximos de espera de cada Job.
+        :param max_workers: Búsquedas simultáneas (por defecto, todas).
+        :return: Generador de diccionarios {name, query, results, error, stats}; stats incluye
+                 dispatch_s, polls y total_s de cada Job.
+        """
+        if not isinstance(queries, dict):
+            queries = {query: query for query in queries}
+        if not queries:
+            return
+
+        def run(name, query):
+            stats = {}
             try:
-                content = response.json()
-                dispatch_state = content.get("entry", [])[0].get("content", {}).get("dispatchState")
-                if dispatch_state == "DONE":
-                    print("\nJob completado.")
-                    return True
+                results = self.run_search(query, exec_mode=exec_mode, timeout=timeout, stats=stats)
+                return {"name": name, "query": query, "results": results, "error": None, "stats": stats}
+            except (SplunkError, requests.RequestException) as e:
+                return {"name": name, "query": query, "results": [], "error": str(e), "stats": stats}
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(queries)) as executor:
+            futures = [executor.submit(run, name, query) for name, query in queries.items()]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def get_search_results(self, sid):
+        """Obtiene todos los resultados de búsqueda usando el SID"""
+        results = list(self.iter_search_results(sid))
+        print(f"Se recuperaron {len(results)} resultados.")
+        return results
+
+    def iter_search_results(self, sid, page_size=RESULTS_PAGE_SIZE):
+        """
+        Genera los resultados de un Job terminado paginando /results con offset y count
+
+        :param sid: SID del Job.
+        :param page_size: Resultados pedidos en cada página.
+        :return: Generador de resultados sin filtrar.
+        """
+        offset = 0
+        while True:
+            params = {
+                "output_mode": "json",  # Solicitar resultados en formato JSON
+                "offset": offset,
+                "count": page_size
+            }
+            response = self._request("GET", f"/services/search/jobs/{sid}/results", params=params)
+            if response.status_code != 200:  # Comprobar si la solicitud fue exitosa
+                raise SplunkError(f"Error al obtener los resultados. Código de estado: {response.status_code}. "
+                                  f"Respuesta: {response.text}")
+            try:
+                page = response.json().get("results", [])
             except json.JSONDecodeError:
-                print("\nLa respuesta no está en formato JSON. Intentando parsear XML...")
-                root = ET.fromstring(response.text)
-                for elem in root.iter("{http://dev.splunk.com/ns/rest}key"):
-                    if elem.attrib.get("name") == "dispatchState" and elem.text == "DONE":
-                        print("\nJob completado.")
-                        return True
-        time.sleep(2)
-    print("\nError: El Job no se completó dentro del tiempo esperado.")
-    exit()
+                raise SplunkError(f"Error al decodificar los resultados del Job. Respuesta: {response.text}")
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+
+    def export_search(self, search_query, earliest_time=None, latest_time=None):
+        """
+        Ejecuta la búsqueda en /services/search/jobs/export y genera los resultados a medida que llegan
+
+        La respuesta se lee línea por línea, sin cargarla completa en memoria, y se descartan las
+        filas de vista previa.
+
+        :param search_query: Consulta SPL.
+        :param earliest_time: Inicio de la ventana de tiempo (opcional, por ejemplo "-24h").
+        :param latest_time: Fin de la ventana de tiempo (opcional).
+        :return: Generador de resultados sin filtrar.
+        """
+        if not search_query.strip():
+            raise SplunkError("La consulta de búsqueda no puede estar vacía.")
+        data = {"search": search_query, "output_mode": "json"}
+        if earliest_time is not None:
+            data["earliest_time"] = earliest_time
+        if latest_time is not None:
+            data["latest_time"] = latest_time
+        response = self._request("POST", "/services/search/jobs/export", data=data, stream=True)
+        with response:
+            if response.status_code != 200:
+                raise SplunkError(f"Error en la exportación. Código de estado: {response.status_code}. "
+                                  f"Respuesta: {response.text}")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                row = json.loads(line)
+                if row.get("preview"):
+                    continue
+                if "result" in row:
+                    yield row["result"]
+                for message in row.get("messages", []):
+                    if message.get("type") in ("ERROR", "FATAL"):
+                        raise SplunkError(f"Error en la exportación: {message.get('text')}")
+
+    def export_filtered(self, search_query, output_file=None, **kwargs):
+        """
+        Exporta una búsqueda y genera los registros ya filtrados, o los escribe en un archivo NDJSON
+
+        :param search_query: Consulta SPL.
+        :param output_file: Si se indica, los registros se escriben en este archivo NDJSON.
+        :param kwargs: earliest_time / latest_time para export_search.
+        :return: Generador de registros filtrados, o el número de registros escritos si hay output_file.
+        """
+        records = iter_filter_results(self.export_search(search_query, **kwargs))
+        if output_file is None:
+            return records
+        return write_ndjson(records, output_file)
+
+    def close(self):
+        """Cierra las conexiones del pool"""
+        self.session.close()
+
+
+# Cliente compartido por las funciones de módulo
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """Devuelve el SplunkClient compartido del proceso, creándolo la primera vez"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SplunkClient()
+        return _default_client
+
+
+def _call_default_client(session_key, method, *args):
+    """Ejecuta un método del cliente compartido; ante un error lo informa y termina como antes"""
+    client = get_default_client()
+    if session_key is not None:
+        client.set_session_key(session_key)
+    try:
+        return getattr(client, method)(*args)
+    except SplunkError as e:
+        print(f"Error: {e}")
+        exit()
+
+
+# Función para obtener el Session Key con reintentos
+def get_session_key():
+    """Autentica en Splunk y obtiene un Session Key, con reintentos en caso de fallo"""
+    return _call_default_client(None, "login")
+
+# Función para crear un Job de búsqueda
+def create_search_job(session_key, search_query):
+    """Crea un Job de búsqueda en Splunk y devuelve el SID"""
+    return _call_default_client(session_key, "create_search_job", search_query)
+
+# Función para verificar el estado del Job
+def check_job_status(session_key, sid, timeout=JOB_TIMEOUT):
+    """Verifica si el Job de búsqueda está completo; lanza SplunkTimeoutError si no termina a tiempo"""
+    client = get_default_client()
+    if session_key is not None:
+        client.set_session_key(session_key)
+    return client.check_job_status(sid, timeout=timeout)
 
 # Función para obtener los resultados del Job
 def get_search_results(session_key, sid):
     """Obtiene los resultados de búsqueda usando el SID"""
-    url = f"{splunk_url}/services/search/jobs/{sid}/results"
-    headers = {"Authorization": f"Splunk {session_key}"}  # Agregar Session Key al encabezado
-    params = {
-        "output_mode": "json"  # Solicitar resultados en formato JSON
-    }
-    response = requests.get(url, headers=headers, params=params, verify=False)  # Enviar solicitud GET
+    return _call_default_client(session_key, "get_search_results", sid)
 
-    if response.status_code == 200:  # Comprobar si la solicitud fue exitosa
-        try:
-            results = response.json().get("results", [])  # Obtener los resultados
-            print(f"Se recuperaron {len(results)} resultados.")
-            return results
-        except json.JSONDecodeError:
-            print("Error al decodificar los resultados del Job. Respuesta:", response.text)
-            exit()
-    else:
-        print("Error al obtener los resultados. Código de estado:", response.status_code)
-        print("Respuesta:", response.text)
-        exit()
+# Parser de _raw: encabezado syslog "programa[pid]: mensaje" y reglas por palabra clave.
+# Cada regla es (palabra clave, outcome, regex); la palabra clave se busca con "in" y solo la
+# primera regla que coincide aplica su regex, así cada línea se recorre prácticamente una vez.
+_SYSLOG_HEADER_RE = re.compile(r"(?P<program>[\w.\-/]+)\[(?P<pid>\d+)\]:\s*(?P<message>.*)")
+_MESSAGE_RULES = (
+    ("Failed password", "failure",
+     re.compile(r"Failed password for (?:invalid user )?(?P<user>\S+) from (?P<src_ip>[\d.:a-fA-F]+) port (?P<port>\d+)")),
+    ("Accepted ", "success",
+     re.compile(r"Accepted \S+ for (?P<user>\S+) from (?P<src_ip>[\d.:a-fA-F]+) port (?P<port>\d+)")),
+    ("Invalid user", "invalid_user",
+     re.compile(r"Invalid user (?P<user>\S+) from (?P<src_ip>[\d.:a-fA-F]+)(?: port (?P<port>\d+))?")),
+    ("session opened", "session_opened", re.compile(r"session opened for user (?P<user>\S+)")),
+    ("session closed", "session_closed", re.compile(r"session closed for user (?P<user>\S+)")),
+    ("disconnect", "disconnect",
+     re.compile(r"disconnect from (?P<src_ip>[\d.:a-fA-F]+)(?: port (?P<port>\d+))?", re.IGNORECASE)),
+    ("listening", "listening", re.compile(r"listening on \S+ port (?P<port>\d+)", re.IGNORECASE)),
+)
+PARSED_FIELDS = ("program", "pid", "user", "src_ip", "port", "outcome")
+
+# Función para extraer campos estructurados de _raw
+def parse_raw(raw):
+    """Extrae program, pid, user, src_ip, port y outcome de una línea de log; los campos ausentes quedan en None"""
+    fields = dict.fromkeys(PARSED_FIELDS)
+    header = _SYSLOG_HEADER_RE.search(raw or "")
+    if header is None:
+        return fields
+    fields["program"] = header.group("program")
+    fields["pid"] = int(header.group("pid"))
+    message = header.group("message")
+    for keyword, outcome, pattern in _MESSAGE_RULES:
+        if keyword in message:
+            match = pattern.search(message)
+            if match:
+                fields.update((k, v) for k, v in match.groupdict().items() if v is not None)
+                fields["outcome"] = outcome
+                if fields["port"] is not None:
+                    fields["port"] = int(fields["port"])
+                break
+    return fields
 
 # Función para filtrar datos innecesarios
-def filter_results(results):
+def filter_result(result, parse=False):
+    """
+    Extrae los campos relevantes de un resultado; con parse=True agrega los campos de parse_raw.
+    Las filas de búsquedas transformadoras (stats, top, timechart) no tienen _raw y se devuelven tal cual.
+    """
+    if "_raw" not in result:
+        return dict(result)
+    record = {
+        "time": result.get("_time"),  # Tiempo del evento
+        "host": result.get("host"),  # Host de origen
+        "source": result.get("source"),  # Fuente del evento
+        "sourcetype": result.get("sourcetype"),  # Tipo de fuente
+        "raw": result.get("_raw")  # Registro crudo
+    }
+    if parse:
+        record.update(parse_raw(record["raw"]))
+    return record
+
+def filter_results(results, parse=False):
     """Filtra los campos relevantes de los resultados"""
-    filtered_results = []
+    return [filter_result(result, parse) for result in results]
+
+def iter_filter_results(results, parse=False):
+    """Versión perezosa de filter_results: filtra cada resultado a medida que se consume"""
     for result in results:
-        filtered_results.append({
-            "time": result.get("_time"),  # Tiempo del evento
-            "host": result.get("host"),  # Host de origen
-            "source": result.get("source"),  # Fuente del evento
-            "sourcetype": result.get("sourcetype"),  # Tipo de fuente
-            "raw": result.get("_raw")  # Registro crudo
-        })
-    return filtered_results
+        yield filter_result(result, parse)
+
+# Índices invertidos sobre los campos extraídos
+INDEXED_FIELDS = ("src_ip", "user")
+
+def index_record(indexes, position, record):
+    """Agrega la posición de un registro parseado a los índices {campo: {valor: [posiciones]}}"""
+    for field in INDEXED_FIELDS:
+        value = record.get(field)
+        if value is not None:
+            indexes.setdefault(field, {}).setdefault(value, []).append(position)
+
+def build_indexes(records):
+    """Construye los índices invertidos por src_ip y user de una lista de registros parseados"""
+    indexes = {field: {} for field in INDEXED_FIELDS}
+    for position, record in enumerate(records):
+        index_record(indexes, position, record)
+    return indexes
+
+def brute_force_sources(records, indexes, min_failures=3):
+    """
+    Devuelve las IPs con al menos min_failures intentos fallidos, de la más activa a la menos
+
+    :return: Lista de {"src_ip", "failures", "users"} usando el índice por src_ip (sin recorrer todos los registros).
+    """
+    sources = []
+    for src_ip, positions in indexes.get("src_ip", {}).items():
+        failures = [records[p] for p in positions if records[p].get("outcome") in ("failure", "invalid_user")]
+        if len(failures) >= min_failures:
+            sources.append({
+                "src_ip": src_ip,
+                "failures": len(failures),
+                "users": sorted({r["user"] for r in failures if r.get("user")})
+            })
+    return sorted(sources, key=lambda source: source["failures"], reverse=True)
+
+# Función para escribir registros en formato NDJSON
+def write_ndjson(records, output_file):
+    """Escribe un registro JSON por línea sin acumularlos en memoria y devuelve cuántos se escribieron"""
+    count = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    print(f"Se escribieron {count} registros en {output_file}")
+    return count
+
+# Función para el informe de seguridad
+def security_briefing(client=None, queries=None):
+    """
+    Ejecuta en paralelo las búsquedas del informe de seguridad y devuelve {nombre: resultados filtrados}.
+    Los eventos se reducen a sus campos relevantes; las filas de top_talkers conservan src_ip, count y percent.
+    """
+    client = client or get_default_client()
+    briefing = {}
+    for job in client.run_searches(queries or SECURITY_BRIEFING_QUERIES):
+        if job["error"]:
+            print(f"Error en la búsqueda {job['name']}: {job['error']}")
+        else:
+            print(f"Búsqueda {job['name']} lista en {job['stats']['total_s']:.2f} s")
+        briefing[job["name"]] = filter_results(job["results"])
+    return briefing
 
 # Función principal
 def main_splunk():
     """Función principal para ejecutar el proceso completo"""
-    session_key = get_session_key()  # Obtener el Session Key
+    client = SplunkClient()  # Sesión persistente; autentica en la primera llamada
 
     # Consulta predefinida de ejemplo
     default_search_query = "search index=main sourcetype=pan:config | head 10"
@@ -134,17 +582,11 @@ def main_splunk():
     else:
         search_query = default_search_query
 
-    # Crear el Job de búsqueda
-    sid = create_search_job(session_key, search_query)
-
-    # Verificar el estado del Job
-    check_job_status(session_key, sid)
-
-    # Obtener los resultados del Job
-    results = get_search_results(session_key, sid)
+    # Ejecutar la búsqueda; una consulta corta se resuelve en una sola petición
+    results = client.run_search(search_query, exec_mode="oneshot")
 
     # Filtrar los resultados
-    filtered_results = filter_results(results)
+    filtered_results = filter_results(results, parse=True)
 
     # Imprimir los resultados en la consola
     print("Resultados filtrados:")
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pyaudio
+
+# Polly entrega PCM lineal de 16 bits, mono, a esta frecuencia
+FRECUENCIA_PCM = 16000
+
+# Oraciones más cortas se juntan con la siguiente para no pedir audios de dos palabras
+MIN_CARACTERES_ORACION = 25
+
+# Oraciones que se sintetizan en paralelo mientras suena la anterior
+HILOS_SINTESIS = 2
+
+# Cache en disco de audios sintetizados, con tope de tamaño
+CACHE_DIR = os.getenv("POLLY_CACHE_DIR", "polly_cache")
+CACHE_MAX_BYTES = int(os.getenv("POLLY_CACHE_MAX_MB", "50")) * 1024 * 1024
+
+# Fin de oración: puntuación seguida de espacio, o salto de línea ("1.5" no corta)
+_FIN_ORACION_RE = re.compile(r"(?<=[.!?:;])\s+|\n+")
+
+
+def dividir_en_oraciones(fragmentos, min_caracteres=MIN_CARACTERES_ORACION):
+    """
+    Agrupa los fragmentos de texto de un stream en oraciones completas.
+
+    :param fragmentos: Iterable de fragmentos de texto, tal como llegan del modelo.
+    :param min_caracteres: Largo mínimo de cada oración emitida (salvo la última).
+    :return: Generador de oraciones, emitidas en cuanto se completan.
+    """
+    pendiente = ""
+    for fragmento in fragmentos:
+        pendiente += fragmento
+        *completas, pendiente = _FIN_ORACION_RE.split(pendiente)
+        acumulado = ""
+        for oracion in completas:
+            acumulado = f"{acumulado} {oracion}".strip()
+            if len(acumulado) >= min_caracteres:
+                yield acumulado
+                acumulado = ""
+        if acumulado:
+            pendiente = f"{acumulado} {pendiente}"
+    if pendiente.strip():
+        yield pendiente.strip()
+
+
+class CacheAudio:
+    """
+    Cache en disco de audios de Polly, direccionada por contenido.
+
+    Cada audio se guarda en un archivo cuyo nombre es el hash de (voz, frecuencia, texto), así
+    la misma frase con la misma voz nunca se sintetiza dos veces, ni entre ejecuciones. Al
+    superar ``max_bytes`` se borran los audios usados hace más tiempo (LRU por fecha de acceso).
+    """
+
+    def __init__(self, directorio=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        """
+        :param directorio: Carpeta de los audios.
+        :param max_bytes: Tamaño máximo de la carpeta.
+        """
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._tamanos = OrderedDict()  # {clave: bytes}, del menos al más recientemente usado
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(directorio, exist_ok=True)
+        archivos = [entrada for entrada in os.scandir(directorio) if entrada.name.endswith(".pcm")]
+        for entrada in sorted(archivos, key=lambda entrada: entrada.stat().st_mtime):
+            self._tamanos[entrada.name[:-4]] = entrada.stat().st_size
+
+    @staticmethod
+    def clave(voice_id, texto):
+        return hashlib.sha256(f"{voice_id}\n{FRECUENCIA_PCM}\n{texto}".encode("utf-8")).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pcm")
+
+    def obtener(self, clave):
+        """Devuelve el audio guardado o None"""
+        with self._lock:
+            if clave not in self._tamanos:
+                self.fallos += 1
+                return None
+            self._tamanos.move_to_end(clave)
+        try:
+            with open(self._ruta(clave), "rb") as archivo:
+                audio = archivo.read()
+            os.utime(self._ruta(clave))  # La fecha de modificación marca el último uso
+        except OSError:
+            with self._lock:
+                self._tamanos.pop(clave, None)
+                self.fallos += 1
+            return None
+        with self._lock:
+            self.aciertos += 1
+        return audio
+
+    def guardar(self, clave, audio):
+        temporal = f"{self._ruta(clave)}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(audio)
+        os.replace(temporal, self._ruta(clave))
+        with self._lock:
+            self._tamanos[clave] = len(audio)
+            self._tamanos.move_to_end(clave)
+            total = sum(self._tamanos.values())
+            descartadas = []
+            while total > self.max_bytes and len(self._tamanos) > 1:
+                antigua, tamano = self._tamanos.popitem(last=False)
+                total -= tamano
+                descartadas.append(antigua)
+        for antigua in descartadas:
+            try:
+                os.remove(self._ruta(antigua))
+            except OSError:
+                pass
+
+    def estadisticas(self):
+        with self._lock:
+            return {"audios": len(self._tamanos), "bytes": sum(self._tamanos.values()),
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+class VozPolly:
+    """
+    Lectura en voz alta de un texto que todavía se está generando.
+
+    Cada oración se envía a Amazon Polly apenas se completa, mientras el modelo sigue
+    escribiendo; un hilo de reproducción toca los audios en orden en cuanto llegan, por lo que
+    la voz empieza con la primera oración en lugar de esperar la respuesta completa. Las
+    llamadas a ``hablar`` se reproducen de a una: si ya hay algo sonando, la siguiente espera.
+    """
+
+    def __init__(self, region, voice_id, hilos_sintesis=HILOS_SINTESIS, cache=None):
+        """
+        :param region: Región de AWS de Polly.
+        :param voice_id: Voz de Polly, por ejemplo "Lucia".
+        :param hilos_sintesis: Oraciones que se sintetizan en paralelo.
+        :param cache: CacheAudio de los audios sintetizados (por defecto en CACHE_DIR).
+        """
+        self.voice_id = voice_id
+        # Un solo cliente para toda la sesión; boto3 reutiliza sus conexiones HTTPS
+        self.polly = boto3.client("polly", region_name=region)
+        self.cache = cache if cache is not None else CacheAudio()
+        self._executor = ThreadPoolExecutor(max_workers=hilos_sintesis, thread_name_prefix="polly")
+        self._audio = pyaudio.PyAudio()
+        self._reproduciendo = threading.Lock()  # Una sola salida de audio a la vez
+
+    def sintetizar(self, texto):
+        """Devuelve el audio PCM de 16 bits mono de un texto, desde la cache si ya se sintetizó"""
+        texto = " ".join(texto.split())
+        clave = self.cache.clave(self.voice_id, texto)
+        audio = self.cache.obtener(clave)
+        if audio is None:
+            response = self.polly.synthesize_speech(Text=texto, OutputFormat="pcm",
+                                                    SampleRate=str(FRECUENCIA_PCM), VoiceId=self.voice_id)
+            audio = response["AudioStream"].read()
+            self.cache.guardar(clave, audio)
+        return audio
+
+    def _reproducir(self, pendientes, inicio):
+        salida = self._audio.open(format=pyaudio.paInt16, channels=1, rate=FRECUENCIA_PCM, output=True)
+        primero = True
+        try:
+            while True:
+                futuro = pendientes.get()
+                if futuro is None:
+                    break
+                try:
+                    audio = futuro.result()
+                except Exception as e:
+                    print(f"Error en TTS con Amazon Polly: {e}")
+                    continue
+                if primero:
+                    print(f"Primer audio a los {time.perf_counter() - inicio:.2f} s.")
+                    primero = False
+                salida.write(audio)
+        finally:
+            salida.stop_stream()
+            salida.close()
+
+    def hablar(self, oraciones):
+        """
+        Sintetiza y reproduce las oraciones en orden a medida que se producen.
+
+        :param oraciones: Iterable de oraciones (por ejemplo, de dividir_en_oraciones); si otra
+                          llamada está sonando, no se empieza a leer hasta que termine.
+        :return: Lista de oraciones leídas, cuando terminaron de sonar.
+        """
+        with self._reproduciendo:
+            inicio = time.perf_counter()
+            pendientes = queue.Queue()
+            reproductor = threading.Thread(target=self._reproducir, args=(pendientes, inicio), daemon=True)
+            reproductor.start()
+            leidas = []
+            try:
+                for oracion in oraciones:
+                    leidas.append(oracion)
+                    pendientes.put(self._executor.submit(self.sintetizar, oracion))
+            finally:
+                # Aunque el stream del modelo falle, lo ya sintetizado termina de sonar
+                pendientes.put(None)
+                reproductor.join()
+        print(f"Cache de audio: {self.cache.estadisticas()}")
+        return leidas